@@ -2,6 +2,7 @@ from datetime import datetime
 import json
 import os
 from typing import List
+import redis
 from sqlalchemy.exc import SQLAlchemyError
 from logging_conf import setup_logging
 from database.db_base import db_base
@@ -9,6 +10,7 @@ from database.models import Task, User
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 from shared_utils.task_status_enum import TaskStatus
+from shared_utils.queue_tasks import RabbitMqOperationTypes, TaskProgress
 
 
 logger = setup_logging()
@@ -16,6 +18,9 @@ logger = setup_logging()
 
 class DbHelper:
     _instance = None
+    # Progress changes every few seconds, so it is kept in Redis instead of the tasks table
+    TASK_PROGRESS_KEY_PREFIX = "task_progress:"
+    TASK_PROGRESS_TTL_SECONDS = 24 * 60 * 60
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -28,6 +33,7 @@ class DbHelper:
             self.Session = sessionmaker(bind=self.engine)
             self.Base = db_base.Base
             self.Base.metadata.create_all(self.engine)
+            self.redis = redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379'))
             self.initialized = True
             logger.info("Database connected")
 
@@ -286,6 +292,39 @@ class DbHelper:
             session.close()
 
 
+    def set_task_progress(self, task_id: str, op_type: RabbitMqOperationTypes, progress: TaskProgress):
+        try:
+            self.redis.set(
+                self._get_task_progress_key(task_id, op_type),
+                progress.to_json(),
+                ex=self.TASK_PROGRESS_TTL_SECONDS
+            )
+        except redis.RedisError as e:
+            logger.error(f"Error saving progress of task {task_id}: {e}")
+
+    def clear_task_progress(self, task_id: str, op_type: RabbitMqOperationTypes):
+        try:
+            self.redis.delete(self._get_task_progress_key(task_id, op_type))
+        except redis.RedisError as e:
+            logger.error(f"Error clearing progress of task {task_id}: {e}")
+
+    def get_task_progress(self, task_id: str) -> dict:
+        """Returns progress of every operation of the task, None for operations that are not running."""
+        op_types = list(RabbitMqOperationTypes)
+        try:
+            values = self.redis.mget([self._get_task_progress_key(task_id, op_type) for op_type in op_types])
+        except redis.RedisError as e:
+            logger.error(f"Error getting progress of task {task_id}: {e}")
+            values = [None] * len(op_types)
+        return {
+            op_type.name.lower(): json.loads(value) if value is not None else None
+            for op_type, value in zip(op_types, values)
+        }
+
+    def _get_task_progress_key(self, task_id: str, op_type: RabbitMqOperationTypes) -> str:
+        return f"{self.TASK_PROGRESS_KEY_PREFIX}{task_id}:{op_type.name.lower()}"
+
+
     def reset_all_tasks_status(self):
         logger.debug("Resetting all tasks statuses")
         session = self._get_session()
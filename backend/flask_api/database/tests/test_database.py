@@ -5,6 +5,7 @@ import os
 from unittest.mock import patch, MagicMock
 from database.models import Task, User
 from database.db_helper import DbHelper
+from shared_utils.queue_tasks import RabbitMqOperationTypes, TaskProgress
 import shutil
 
 
@@ -285,3 +286,30 @@ class TestDatabaseHelper(unittest.TestCase):
         self.mock_session.close.assert_called_once()
         self.assertFalse(is_sucess)
         
+
+
+    def test_set_task_progress(self):
+        self.db_helper.redis = MagicMock()
+        progress = TaskProgress(stage="synthesis", done=3, total=10, eta_seconds=20.0)
+
+        self.db_helper.set_task_progress("test_id", RabbitMqOperationTypes.VOICE_GEN, progress)
+
+        self.db_helper.redis.set.assert_called_once_with(
+            "task_progress:test_id:voice_gen",
+            progress.to_json(),
+            ex=DbHelper.TASK_PROGRESS_TTL_SECONDS
+        )
+
+
+    def test_get_task_progress(self):
+        self.db_helper.redis = MagicMock()
+        progress = TaskProgress(stage="synthesis", done=3, total=10, eta_seconds=20.0)
+        self.db_helper.redis.mget.return_value = [None, progress.to_json().encode()]
+
+        task_progress = self.db_helper.get_task_progress("test_id")
+
+        self.db_helper.redis.mget.assert_called_once_with(["task_progress:test_id:subs_gen", "task_progress:test_id:voice_gen"])
+        self.assertEqual(task_progress, {
+            "subs_gen": None,
+            "voice_gen": {"stage": "synthesis", "done": 3, "total": 10, "eta_seconds": 20.0},
+        })
@@ -1,7 +1,5 @@
 import os
 import pika
-from pika.adapters.blocking_connection import BlockingChannel
-from pika.spec import Basic, BasicProperties
 from pika.exceptions import StreamLostError
 from config_rabbitmq import ConfigRabbitMQ
 from shared_utils.rabbitmq_base import RabbitMQBase
@@ -27,12 +25,14 @@ class RabbitMQProducer(RabbitMQBase):
         self.db_helper: DbHelper = DbHelper()
 
     def _publish_message(self, queue: str, body_json: str):
-        self.channel.basic_publish(
-            exchange='',
-            routing_key=queue,
-            body=body_json,
-            properties=pika.BasicProperties(delivery_mode=2,)  # make message persistent
-        )
+        # Called from request threads, the lock keeps the heartbeat thread off the connection meanwhile
+        with self._connection_lock:
+            self.channel.basic_publish(
+                exchange='',
+                routing_key=queue,
+                body=body_json,
+                properties=pika.BasicProperties(delivery_mode=2,)  # make message persistent
+            )
 
     def add_task_to_subs_gen_queue(self, task: SubsGenQueueItem):
         try:
@@ -72,22 +72,31 @@ class RabbitMQConsumer(RabbitMQBase):
     def watch_results_queue(self):
             while True:
                 try:
-                    self.channel.basic_consume(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, on_message_callback=self._callback)
                     logger.info('Starting to listen results queue')
-                    self.channel.start_consuming()
+                    # Results of one task must be applied in order, so they are processed one by one
+                    self.consume_concurrently(
+                        queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE,
+                        process_message=self._process_message,
+                        concurrency=1
+                    )
                 except Exception as e:
                     logger.error(f"Error while consuming results queue: {e}")
                     self._reconnect()
                     
 
-    def _callback(self, ch: BlockingChannel, method: Basic.Deliver, properties: BasicProperties, body: str | bytes):
+    def _process_message(self, body: str | bytes):
         res_item = ResultsQueueItem.from_json(body)
         new_status = res_item.op_status
-        if new_status != TaskStatus.IDLE:
+        if res_item.progress is not None:
+            self.db_helper.set_task_progress(res_item.task_id, res_item.op_type, res_item.progress)
+        elif new_status == TaskStatus.PROCESSING:
             self._update_task_status(res_item, new_status)
         else:
-            self._update_task_results(res_item)
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+            self.db_helper.clear_task_progress(res_item.task_id, res_item.op_type)
+            if new_status != TaskStatus.IDLE:
+                self._update_task_status(res_item, new_status)
+            else:
+                self._update_task_results(res_item)
 
     def _update_task_status(self, res_item: ResultsQueueItem, new_status: TaskStatus):
         if res_item.op_type == RabbitMqOperationTypes.SUBS_GEN:
@@ -87,7 +87,11 @@ def create_blueprint(
         task = db_helper.get_task_by_id(id)
         if task is None:
             return jsonify({'status': 'error', "message":  "Task not found"}),  404
-        return jsonify({'status': 'success', "task_info": task.to_json()}), 200
+        return jsonify({
+            'status': 'success',
+            "task_info": task.to_json(),
+            "progress": db_helper.get_task_progress(id)
+        }), 200
 
 
     @bp.route("/create_task",  methods=["POST"])
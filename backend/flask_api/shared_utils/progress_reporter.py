@@ -0,0 +1,46 @@
+import threading
+import time
+from typing import Callable
+
+from shared_utils.queue_tasks import TaskProgress
+
+
+class ProgressReporter:
+    """
+    Turns progress updates of a long operation into TaskProgress messages for the publish callback.
+    Messages are throttled to one per min_interval seconds, stage changes and finished stages are always sent.
+    ETA is estimated from the average speed of the current stage.
+    """
+    def __init__(self, publish: Callable[[TaskProgress], None], min_interval: float):
+        self.publish = publish
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._stage = None
+        self._stage_start_time = 0.0
+        self._stage_start_done = 0
+        self._last_publish_time = None
+
+    def update(self, stage: str, done: int, total: int):
+        with self._lock:
+            now = time.monotonic()
+            is_new_stage = stage != self._stage
+            if is_new_stage:
+                self._stage = stage
+                self._stage_start_time = now
+                # Work done before the stage started (e.g. resumed items) does not count for the speed
+                self._stage_start_done = done
+
+            is_throttled = self._last_publish_time is not None and now - self._last_publish_time < self.min_interval
+            if is_throttled and not is_new_stage and done < total:
+                return
+            self._last_publish_time = now
+            progress = TaskProgress(stage, done, total, self._get_eta_seconds(now, done, total))
+        self.publish(progress)
+
+    def _get_eta_seconds(self, now: float, done: int, total: int) -> float | None:
+        if done >= total:
+            return 0.0
+        stage_done = done - self._stage_start_done
+        if stage_done <= 0:
+            return None
+        return round((now - self._stage_start_time) / stage_done * (total - done), 1)
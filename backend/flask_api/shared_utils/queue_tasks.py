@@ -106,18 +106,45 @@ class VoiceGenResultsItem:
         return False
     
 
+class TaskProgress:
+    def __init__(self, stage: str, done: int, total: int, eta_seconds: float | None = None):
+        self.stage = stage
+        self.done = done
+        self.total = total
+        self.eta_seconds = eta_seconds
+
+    def to_json(self) -> str:
+        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True, indent=4)
+
+    @staticmethod
+    def from_json(json_str: str):
+        json_dict = json.loads(json_str)
+        return TaskProgress(**json_dict)
+
+    def __eq__(self, other):
+        if isinstance(other, TaskProgress):
+            return (self.stage == other.stage and
+                    self.done == other.done and
+                    self.total == other.total and
+                    self.eta_seconds == other.eta_seconds
+                    )
+        return False
+
+
 class ResultsQueueItem: 
     def __init__(
         self, 
         task_id: str, 
         op_type: RabbitMqOperationTypes, 
         op_status: TaskStatus, 
-        results: SubsGenResultsItem | VoiceGenResultsItem | None = None
+        results: SubsGenResultsItem | VoiceGenResultsItem | None = None,
+        progress: TaskProgress | None = None
         ):
         self.task_id = task_id
         self.op_type = op_type
         self.op_status = op_status
         self.results = results
+        self.progress = progress
         
     def to_json(self) -> str:
         json_dict = {
@@ -127,6 +154,8 @@ class ResultsQueueItem:
         }
         if self.results is not None:
             json_dict["results"] = self.results.to_json()
+        if self.progress is not None:
+            json_dict["progress"] = self.progress.to_json()
         return json.dumps(json_dict, default=lambda o: o.__dict__, sort_keys=True, indent=4)
     
     @staticmethod
@@ -144,8 +173,10 @@ class ResultsQueueItem:
                 results = VoiceGenResultsItem.from_json(json_dict["results"])
         else:
             results = None
+
+        progress = TaskProgress.from_json(json_dict["progress"]) if "progress" in json_dict else None
         
-        return ResultsQueueItem(task_id, op_type, op_status, results)
+        return ResultsQueueItem(task_id, op_type, op_status, results, progress)
         
     def __eq__(self, other):
         if isinstance(other, ResultsQueueItem):
@@ -153,6 +184,7 @@ class ResultsQueueItem:
                     self.op_type == other.op_type and
                     self.op_type == other.op_type and
                     self.op_status == other.op_status and
-                    self.results == other.results
+                    self.results == other.results and
+                    self.progress == other.progress
                     )
         return False
@@ -1,7 +1,16 @@
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
 import pika
-from pika.exceptions import StreamLostError
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import AMQPError, StreamLostError
+from pika.spec import Basic, BasicProperties
+from logging_conf import setup_logging
+
+
+logger = setup_logging()
 
 
 class RabbitMQBase:
@@ -9,6 +18,10 @@ class RabbitMQBase:
         self.username = username
         self.password = password
         self.rabbitmq_host = rabbitmq_host
+        # Guards the connection between the heartbeat thread and start of consuming
+        self._connection_lock = threading.Lock()
+        self._is_consuming = False
+        self._executor = None
         self._connect()
         threading.Thread(target=self._send_heartbeat, daemon=True).start()
 
@@ -23,21 +36,66 @@ class RabbitMQBase:
         self.channel = self.connection.channel()
 
     def _reconnect(self):
+        with self._connection_lock:
+            self._is_consuming = False
         self._connect()
 
     def _send_heartbeat(self):
+        # A consuming connection is serviced by start_consuming, pika connections are not thread-safe
         while True:
             try:
-                self.connection.process_data_events()
+                with self._connection_lock:
+                    if not self._is_consuming:
+                        self.connection.process_data_events()
                 time.sleep(10)
             except StreamLostError as e:
                 self._reconnect()
             except Exception as e:
                 self._reconnect()
 
+    def consume_concurrently(self, queue: str, process_message: Callable[[bytes], None], concurrency: int):
+        """
+        Consumes the queue running process_message(body) on up to concurrency worker threads.
+        The broker sends at most concurrency unacked messages to this worker, and the calling thread
+        keeps servicing the connection (heartbeats, acks, publishes) while messages are processed.
+        A message is acked after process_message returns. Blocks until the connection fails.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="rabbitmq_job")
+        # The heartbeat thread may be processing events on the connection until consuming starts
+        with self._connection_lock:
+            self.channel.basic_qos(prefetch_count=concurrency)
+            self.channel.basic_consume(queue=queue, on_message_callback=partial(self._on_message, process_message))
+            self._is_consuming = True
+        self.channel.start_consuming()
+
+    def run_in_connection_thread(self, callback: Callable[[], None]):
+        """Schedules callback (e.g. a publish) on the thread servicing the connection."""
+        self.connection.add_callback_threadsafe(callback)
+
+    def _on_message(self, process_message: Callable[[bytes], None], ch: BlockingChannel, method: Basic.Deliver,
+                    properties: BasicProperties, body: bytes):
+        self._executor.submit(self._process_and_ack, process_message, ch, method.delivery_tag, body)
+
+    def _process_and_ack(self, process_message: Callable[[bytes], None], ch: BlockingChannel, delivery_tag: int, body: bytes):
+        try:
+            process_message(body)
+        except Exception as e:
+            # The message is still acked, a redelivered broken message would fail the same way
+            logger.exception(e)
+        try:
+            # The ack must go through the connection the message came from
+            ch.connection.add_callback_threadsafe(partial(self._ack_message, ch, delivery_tag))
+        except AMQPError as e:
+            logger.warning(f"Could not ack message {delivery_tag}, it will be redelivered: {e}")
+
+    @staticmethod
+    def _ack_message(ch: BlockingChannel, delivery_tag: int):
+        if ch.is_open:
+            ch.basic_ack(delivery_tag=delivery_tag)
+
     def close(self):
         try:
             self.channel.close()
         finally:
             self.connection.close()
-
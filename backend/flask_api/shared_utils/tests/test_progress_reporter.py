@@ -0,0 +1,39 @@
+import unittest
+from unittest.mock import patch
+
+from shared_utils.progress_reporter import ProgressReporter
+from shared_utils.queue_tasks import TaskProgress
+
+
+class TestProgressReporter(unittest.TestCase):
+    def setUp(self):
+        self.published = []
+        self.reporter = ProgressReporter(self.published.append, min_interval=5)
+
+    @patch("shared_utils.progress_reporter.time.monotonic")
+    def test_updates_are_throttled(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        self.reporter.update("synthesis", 0, 10)
+        mock_monotonic.return_value = 102.0
+        self.reporter.update("synthesis", 1, 10)
+        mock_monotonic.return_value = 106.0
+        self.reporter.update("synthesis", 3, 10)
+
+        self.assertEqual(self.published, [
+            TaskProgress("synthesis", 0, 10, None),
+            TaskProgress("synthesis", 3, 10, 14.0),
+        ])
+
+    @patch("shared_utils.progress_reporter.time.monotonic")
+    def test_stage_changes_and_completion_are_not_throttled(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        self.reporter.update("synthesis", 4, 10)
+        mock_monotonic.return_value = 101.0
+        self.reporter.update("synthesis", 10, 10)
+        self.reporter.update("muxing", 0, 1)
+
+        self.assertEqual(self.published, [
+            TaskProgress("synthesis", 4, 10, None),
+            TaskProgress("synthesis", 10, 10, 0.0),
+            TaskProgress("muxing", 0, 1, None),
+        ])
@@ -196,6 +196,21 @@ class TestQueueTasks(unittest.TestCase):
         self.assertEqual(item.task_id, expected_item.task_id)
 
 
+    def test_results_queue_item_with_progress(self):
+        res_item = queue_tasks.ResultsQueueItem(
+            task_id = "123123",
+            op_type = queue_tasks.RabbitMqOperationTypes.VOICE_GEN,
+            op_status = queue_tasks.TaskStatus.PROCESSING,
+            progress = queue_tasks.TaskProgress(stage="synthesis", done=5, total=20, eta_seconds=42.5)
+        )
+
+        item = queue_tasks.ResultsQueueItem.from_json(res_item.to_json())
+
+        self.assertEqual(item, res_item)
+        self.assertEqual(item.progress.eta_seconds, 42.5)
+        self.assertIsNone(queue_tasks.ResultsQueueItem.from_json(res_item.to_json()).results)
+
+
     def test_items_from_wrong_json(self):
         wrong_json = """{
     "spam": "eggs",
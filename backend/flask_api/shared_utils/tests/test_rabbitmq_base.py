@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from shared_utils.rabbitmq_base import RabbitMQBase
+
+
+class TestRabbitMQBase(unittest.TestCase):
+    @patch('shared_utils.rabbitmq_base.threading.Thread')
+    @patch('shared_utils.rabbitmq_base.pika.BlockingConnection')
+    def setUp(self, mock_blocking_connection, mock_thread):
+        self.rabbitmq_base = RabbitMQBase(rabbitmq_host="localhost", username="guest", password="guest")
+        self.mock_channel = self.rabbitmq_base.channel
+
+    def test_consume_concurrently_sets_prefetch(self):
+        lock_states = []
+        self.mock_channel.basic_qos.side_effect = lambda **kwargs: lock_states.append(self.rabbitmq_base._connection_lock.locked())
+        self.mock_channel.basic_consume.side_effect = lambda **kwargs: lock_states.append(self.rabbitmq_base._connection_lock.locked())
+
+        self.rabbitmq_base.consume_concurrently(queue="test_queue", process_message=MagicMock(), concurrency=3)
+
+        self.mock_channel.basic_qos.assert_called_once_with(prefetch_count=3)
+        self.mock_channel.basic_consume.assert_called_once()
+        self.mock_channel.start_consuming.assert_called_once()
+        self.assertTrue(self.rabbitmq_base._is_consuming)
+        self.assertEqual(lock_states, [True, True])
+
+    def test_message_is_processed_on_job_thread_and_acked_by_connection_thread(self):
+        process_message = MagicMock()
+        self.rabbitmq_base.consume_concurrently(queue="test_queue", process_message=process_message, concurrency=2)
+        on_message = self.mock_channel.basic_consume.call_args.kwargs["on_message_callback"]
+
+        mock_ch = MagicMock()
+        on_message(mock_ch, MagicMock(delivery_tag=7), MagicMock(), b"body")
+        self.rabbitmq_base._executor.shutdown(wait=True)
+
+        process_message.assert_called_once_with(b"body")
+        mock_ch.basic_ack.assert_not_called()
+        ack_callback = mock_ch.connection.add_callback_threadsafe.call_args.args[0]
+        ack_callback()
+        mock_ch.basic_ack.assert_called_once_with(delivery_tag=7)
+
+    def test_failed_message_is_acked(self):
+        process_message = MagicMock(side_effect=ValueError("broken message"))
+        mock_ch = MagicMock()
+
+        self.rabbitmq_base._process_and_ack(process_message, mock_ch, 3, b"body")
+
+        mock_ch.connection.add_callback_threadsafe.call_args.args[0]()
+        mock_ch.basic_ack.assert_called_once_with(delivery_tag=3)
@@ -205,14 +205,21 @@ class TestRoutes(unittest.TestCase):
     
     def test_get_task_success(self):
         test_task = Task(id="test_id_1", number_id=1, title="test_title_1")
+        test_progress = {
+            "subs_gen": None,
+            "voice_gen": {"stage": "synthesis", "done": 10, "total": 40, "eta_seconds": 90.0},
+        }
         self.mock_db_helper.get_task_by_id.return_value = test_task
+        self.mock_db_helper.get_task_progress.return_value = test_progress
         response = self.client.get("/get_task/test_id_1")
         response_data = response.get_json()
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response_data, {
             'status': 'success',
-            'task_info': test_task.to_json()
+            'task_info': test_task.to_json(),
+            'progress': test_progress
         })
+        self.mock_db_helper.get_task_progress.assert_called_once_with("test_id_1")
 
     def test_get_task_not_found(self):
         self.mock_db_helper.get_task_by_id.return_value = None
@@ -1,4 +1,12 @@
+import os
+
+
 class ConfigRabbitMQ:
     RABBITMQ_SUBS_GEN_QUEUE = "subs_gen_queue"
     RABBITMQ_VOICE_GEN_QUEUE = "voice_gen_queue"
-    RABBITMQ_RESULTS_QUEUE = "results"
\ No newline at end of file
+    RABBITMQ_RESULTS_QUEUE = "results"
+    # Min seconds between progress messages of one task
+    PROGRESS_MESSAGES_INTERVAL = 5
+    # Number of tasks a worker processes at once, also its prefetch count
+    SUBS_GEN_WORKER_CONCURRENCY = int(os.getenv("SUBS_GEN_WORKER_CONCURRENCY", 1))
+    VOICE_GEN_WORKER_CONCURRENCY = int(os.getenv("VOICE_GEN_WORKER_CONCURRENCY", 1))
@@ -0,0 +1,25 @@
+import os
+
+
+class ConfigSubsGen:
+    # Translation rate per backend, in characters per second, and the burst allowed on top of it
+    GOOGLE_TRANSLATE_RATE = float(os.getenv("SUBS_GEN_GOOGLE_TRANSLATE_RATE", 5000))
+    GOOGLE_TRANSLATE_BURST = float(os.getenv("SUBS_GEN_GOOGLE_TRANSLATE_BURST", 15000))
+    # Default Yandex Cloud quota is 1M characters per hour: the whole hourly quota may be used at once,
+    # then it refills at the hourly average rate. Throttling beyond that is handled by the retry backoff
+    YANDEX_TRANSLATE_RATE = float(os.getenv("SUBS_GEN_YANDEX_TRANSLATE_RATE", 1000000 / 3600))
+    YANDEX_TRANSLATE_BURST = float(os.getenv("SUBS_GEN_YANDEX_TRANSLATE_BURST", 1000000))
+    # Yandex request timeout in seconds and retries of connection and server errors
+    YANDEX_TRANSLATE_TIMEOUT = float(os.getenv("SUBS_GEN_YANDEX_TRANSLATE_TIMEOUT", 30))
+    YANDEX_TRANSLATE_MAX_RETRIES = int(os.getenv("SUBS_GEN_YANDEX_TRANSLATE_MAX_RETRIES", 3))
+    # Retries of a throttled translation request, the delay doubles on every attempt
+    TRANSLATE_MAX_RETRIES = int(os.getenv("SUBS_GEN_TRANSLATE_MAX_RETRIES", 5))
+    TRANSLATE_BACKOFF_BASE = float(os.getenv("SUBS_GEN_TRANSLATE_BACKOFF_BASE", 2))
+    TRANSLATE_BACKOFF_MAX = float(os.getenv("SUBS_GEN_TRANSLATE_BACKOFF_MAX", 60))
+    # Number of translation chunks sent at the same time, the rate limit is shared between them
+    TRANSLATE_CONCURRENCY = int(os.getenv("SUBS_GEN_TRANSLATE_CONCURRENCY", 4))
+    # Translation memory of already translated lines, shared by all tasks
+    TRANSLATION_MEMORY_ENABLED = os.getenv("SUBS_GEN_TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+    TRANSLATION_MEMORY_FILEPATH = os.getenv("SUBS_GEN_TRANSLATION_MEMORY_FILEPATH", os.path.join("uploads", "translation_memory.db"))
+    TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("SUBS_GEN_TRANSLATION_MEMORY_MAX_ENTRIES", 200000))
+    TRANSLATION_MEMORY_TTL_DAYS = float(os.getenv("SUBS_GEN_TRANSLATION_MEMORY_TTL_DAYS", 30))
@@ -1,4 +1,5 @@
 import os
+from functools import partial
 import pika
 from logging_conf import setup_logging
 from shared_utils.rabbitmq_base import RabbitMQBase
@@ -6,10 +7,11 @@ from shared_utils.task_status_enum import TaskStatus
 from subs_translator import SubsTranslator, Translators
 from subs_generator import SubsGenerator
 from shared_utils.file_utils import get_task_folder
-from shared_utils.queue_tasks import RabbitMqOperationTypes, ResultsQueueItem, SubsGenQueueItem, SubsGenResultsItem
+from shared_utils.progress_reporter import ProgressReporter
+from shared_utils.queue_tasks import RabbitMqOperationTypes, ResultsQueueItem, SubsGenQueueItem, SubsGenResultsItem, TaskProgress
 from config_rabbitmq import ConfigRabbitMQ
-from pika.adapters.blocking_connection import BlockingChannel
-from pika.spec import Basic, BasicProperties
+from config_subs_gen import ConfigSubsGen
+from utils.translation_memory import TranslationMemory
 
 logger = setup_logging()
 
@@ -24,14 +26,24 @@ class RabbitMQSubsGenWorker(RabbitMQBase):
         self.channel.queue_declare(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, durable=True)
         self.channel.queue_declare(queue=ConfigRabbitMQ.RABBITMQ_SUBS_GEN_QUEUE, durable=True)
         logger.info("RabbitMQ subs gen worker connected")
+        self.translation_memory = None
+        if ConfigSubsGen.TRANSLATION_MEMORY_ENABLED:
+            self.translation_memory = TranslationMemory(
+                db_filepath=ConfigSubsGen.TRANSLATION_MEMORY_FILEPATH,
+                max_entries=ConfigSubsGen.TRANSLATION_MEMORY_MAX_ENTRIES,
+                ttl_seconds=ConfigSubsGen.TRANSLATION_MEMORY_TTL_DAYS * 24 * 60 * 60
+            )
         
 
     def watch_subs_gen_queue(self):
         while True:
             try:
-                self.channel.basic_consume(queue=ConfigRabbitMQ.RABBITMQ_SUBS_GEN_QUEUE, on_message_callback=self._callback)
-                logger.info('Starting to subs_gen queue')
-                self.channel.start_consuming()
+                logger.info(f'Starting to subs_gen queue, concurrency {ConfigRabbitMQ.SUBS_GEN_WORKER_CONCURRENCY}')
+                self.consume_concurrently(
+                    queue=ConfigRabbitMQ.RABBITMQ_SUBS_GEN_QUEUE,
+                    process_message=self._process_message,
+                    concurrency=ConfigRabbitMQ.SUBS_GEN_WORKER_CONCURRENCY
+                )
             except Exception as e:
                 logger.error(f"Error while consuming results queue: {e}")
                 self._reconnect()
@@ -47,8 +59,21 @@ class RabbitMQSubsGenWorker(RabbitMQBase):
             body=body_json,
             properties=pika.BasicProperties(delivery_mode=2,)  # make message persistent
         )
+
+    def _publish_message_threadsafe(self, queue: str, body_json: str):
+        # Tasks run on job threads, the channel may only be used by the connection thread
+        self.run_in_connection_thread(partial(self._publish_message, queue=queue, body_json=body_json))
+
+    def _publish_progress(self, task_id: str, progress: TaskProgress):
+        message = ResultsQueueItem(
+            task_id=task_id,
+            op_type=RabbitMqOperationTypes.SUBS_GEN,
+            op_status=TaskStatus.PROCESSING,
+            progress=progress
+        )
+        self._publish_message_threadsafe(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=message.to_json())
     
-    def _callback(self, ch: BlockingChannel, method: Basic.Deliver, properties: BasicProperties, body: str | bytes):
+    def _process_message(self, body: str | bytes):
         task_item = SubsGenQueueItem.from_json(body)
         logger.debug(f"Received task: {task_item.task_id}")
         
@@ -59,7 +84,7 @@ class RabbitMQSubsGenWorker(RabbitMQBase):
         )
         
         logger.debug(f"Sending task {task_item.task_id} to res queue with status {return_message.op_status.name}")  
-        self._publish_message(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=return_message.to_json())
+        self._publish_message_threadsafe(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=return_message.to_json())
         
         try:
             result = self._generate_subs(task_item)
@@ -71,11 +96,9 @@ class RabbitMQSubsGenWorker(RabbitMQBase):
             return_message.op_status = TaskStatus.ERROR
         
         logger.debug(f"Sending task {task_item.task_id} to res queue with status {return_message.op_status.name}")    
-        self._publish_message(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=return_message.to_json())
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+        self._publish_message_threadsafe(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=return_message.to_json())
     
-    @staticmethod
-    def _generate_subs(task: SubsGenQueueItem) -> SubsGenResultsItem:
+    def _generate_subs(self, task: SubsGenQueueItem) -> SubsGenResultsItem:
         file_exists = os.path.exists(task.vid_filepath)
         if not file_exists:
             message = f"File {task.vid_filepath} does not exist"
@@ -83,7 +106,12 @@ class RabbitMQSubsGenWorker(RabbitMQBase):
             raise FileNotFoundError(message)
 
         task_folder = get_task_folder(task.task_id)
+        progress_reporter = ProgressReporter(
+            publish=partial(self._publish_progress, task.task_id),
+            min_interval=ConfigRabbitMQ.PROGRESS_MESSAGES_INTERVAL
+        )
         
+        progress_reporter.update("transcription", 0, 1)
         subs_generator = SubsGenerator(src_lang=task.lang_from)
         subs_generator.transcript(
             video_file_path=task.vid_filepath,
@@ -96,14 +124,19 @@ class RabbitMQSubsGenWorker(RabbitMQBase):
         subs_translator = SubsTranslator(
             translator=Translators.google,
             source_lang=task.lang_from,
-            target_lang=task.lang_to
+            target_lang=task.lang_to,
+            translation_memory=self.translation_memory
             )
 
         srt_tranlsated_filepath = os.path.join(task_folder, f"{task.task_id}_translated.srt")
         json_tranlsated_filepath = os.path.join(task_folder, f"{task.task_id}_translated.json")
 
-        subs_translator.translate_srt_file(srt_filepath, srt_tranlsated_filepath)
-        subs_translator.translate_json_file(json_filepath, json_tranlsated_filepath)
+        progress_reporter.update("translation", 0, 1)
+        # Translated SRT is built from the same segments as the JSON, so the transcript is translated only once
+        try:
+            subs_translator.translate_subtitles_file(json_filepath, srt_tranlsated_filepath, json_tranlsated_filepath)
+        finally:
+            subs_translator.close()
         
         result = SubsGenResultsItem(
             src_audio_path = audio_filepath,
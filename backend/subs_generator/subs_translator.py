@@ -1,11 +1,18 @@
 import os
+import re
+import threading
 import time
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
 from deep_translator import GoogleTranslator
+from deep_translator.exceptions import TooManyRequests
 import dotenv
 
+from config_subs_gen import ConfigSubsGen
 from shared_utils.sub_parser import Subtitle, export_subtitles_to_json_file, export_subtitles_to_srt_file, parse_json_to_subtitles, parse_srt_to_subtitles
 from utils.my_yandex_translator import MyYandexTranslator
+from utils.rate_limiter import TokenBucketRateLimiter
+from utils.translation_memory import TranslationMemory
 
 from logging_conf import setup_logging
 
@@ -18,26 +25,71 @@ class Translators:
     yandex = 'yandex'
 
 
+# Limiters are shared by all translators of a backend, so concurrent tasks stay within one quota
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _get_rate_limiter(translator: Translators) -> TokenBucketRateLimiter:
+    with _rate_limiters_lock:
+        if translator not in _rate_limiters:
+            if translator == Translators.yandex:
+                rate, burst = ConfigSubsGen.YANDEX_TRANSLATE_RATE, ConfigSubsGen.YANDEX_TRANSLATE_BURST
+            else:
+                rate, burst = ConfigSubsGen.GOOGLE_TRANSLATE_RATE, ConfigSubsGen.GOOGLE_TRANSLATE_BURST
+            _rate_limiters[translator] = TokenBucketRateLimiter(rate=rate, capacity=burst)
+        return _rate_limiters[translator]
+
+
 class SubsTranslator:
     TRANSLATION_LIMIT = 5000
 
-    def __init__(self, translator: Translators, source_lang: str, target_lang: str, end_line_separator: str=" //") -> None:
+    def __init__(self, translator: Translators, source_lang: str, target_lang: str, end_line_separator: str=" //",
+                 translation_memory: TranslationMemory | None = None) -> None:
         dotenv.load_dotenv()
-        self.translator = translator
+        self.translator_name = translator
         self.source_lang = source_lang
         self.target_lang = target_lang
         self.end_line_separator = end_line_separator
-
-        if translator == Translators.google:
-            self.translator = GoogleTranslator(source=self.source_lang, target=self.target_lang)
-        elif translator == Translators.yandex:
-            self.translator = MyYandexTranslator(
+        self.rate_limiter = _get_rate_limiter(translator)
+        self.translation_memory = translation_memory
+        self.rate_limit_wait_time = 0.0
+        self.backoff_time = 0.0
+        self.misaligned_chunks_count = 0
+        self._metrics_lock = threading.Lock()
+        # deep_translator keeps request params on the instance, so every pool thread gets its own Google translator
+        self._thread_local = threading.local()
+        self.translator = self._create_translator()
+        # Pool threads live as long as the translator, so their translators are reused between calls
+        self._executor = ThreadPoolExecutor(max_workers=ConfigSubsGen.TRANSLATE_CONCURRENCY)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if isinstance(self.translator, MyYandexTranslator):
+            self.translator.close()
+
+    def _create_translator(self):
+        if self.translator_name == Translators.google:
+            return GoogleTranslator(source=self.source_lang, target=self.target_lang)
+        elif self.translator_name == Translators.yandex:
+            return MyYandexTranslator(
                 api_key=os.getenv("ya_translate_api_key"), 
                 folder_id=os.getenv("ya_translate_folder_id"),
                 src_lang=self.source_lang,
-                dest_lang=self.target_lang
+                dest_lang=self.target_lang,
+                timeout=ConfigSubsGen.YANDEX_TRANSLATE_TIMEOUT,
+                max_retries=ConfigSubsGen.YANDEX_TRANSLATE_MAX_RETRIES,
+                pool_size=ConfigSubsGen.TRANSLATE_CONCURRENCY
                 )
 
+    def _get_thread_translator(self):
+        # Yandex translator only holds a thread-safe pooled session, all threads share it
+        if self.translator_name == Translators.yandex or threading.current_thread() is threading.main_thread():
+            return self.translator
+        if not hasattr(self._thread_local, "translator"):
+            self._thread_local.translator = self._create_translator()
+        return self._thread_local.translator
+
     def translate_srt_file(self, input_file_path: str, output_file_path: str):
         """
         Translate a subtitle .SRT file from original language to desired language.
@@ -56,11 +108,15 @@ class SubsTranslator:
         export_subtitles_to_json_file(subs_translated_arr, output_file_path)
         logger.debug("New file: " + output_file_path)
 
-    def _parse_text_to_arr(self, text: str):
-        final_arr = text.split("\n\n")
-        if final_arr[-1].strip() == "":
-            final_arr = final_arr[:-1]
-        return final_arr
+    def translate_subtitles_file(self, input_json_file_path: str, output_srt_file_path: str, output_json_file_path: str):
+        """
+        Translate a subtitle .JSON file once and write the result both as .SRT and .JSON file.
+        """
+        subs_arr = parse_json_to_subtitles(input_json_file_path)
+        subs_translated_arr = self._translate_subtitles(subs_arr, self.TRANSLATION_LIMIT, self.end_line_separator)
+        export_subtitles_to_srt_file(subs_translated_arr, output_srt_file_path)
+        export_subtitles_to_json_file(subs_translated_arr, output_json_file_path)
+        logger.debug(f"New files: {output_srt_file_path}, {output_json_file_path}")
 
     def _translate_subtitles(self, subtitles: List[Subtitle], translation_limit: int, end_line_separator: str) -> List[Subtitle]:
         """
@@ -71,39 +127,129 @@ class SubsTranslator:
         :param end_line_separator: Separator to use between subtitles.
         :return: List of translated subtitle objects.
         """
-        text_translatable = ""
-        subs_translated_arr = []
-        translated_subs_counter = 0
+        # Lines already translated in previous tasks are taken from the memory and not sent to the translator
+        memory_translations = {}
+        if self.translation_memory is not None:
+            memory_translations = self.translation_memory.get_many(
+                [subtitle.text for subtitle in subtitles], self.source_lang, self.target_lang, self.translator_name)
+        subtitles_to_translate = [subtitle for subtitle in subtitles if subtitle.text not in memory_translations]
+
+        chunks = self._split_subtitles_to_chunks(subtitles_to_translate, translation_limit, end_line_separator)
+
+        # Chunks are translated concurrently, map keeps the results in chunk order
+        translated_lines = [
+            translated_line
+            for translated_arr in self._executor.map(lambda chunk: self._translate_chunk(chunk, end_line_separator), chunks)
+            for translated_line in translated_arr
+        ]
+
+        new_translations = dict(zip((subtitle.text for subtitle in subtitles_to_translate), translated_lines))
+        if self.translation_memory is not None and new_translations:
+            self.translation_memory.put_many(new_translations, self.source_lang, self.target_lang, self.translator_name)
 
-        for sub_index in range(len(subtitles) + 1):
-            is_last = sub_index == len(subtitles)
-            if not is_last:
-                sub_text = subtitles[sub_index].text
+        subs_translated_arr = []
+        translated_lines_iter = iter(translated_lines)
+        for old_sub in subtitles:
+            if old_sub.text in memory_translations:
+                translated_line = memory_translations[old_sub.text]
             else:
-                sub_text = ""
-
-            if (len(text_translatable) + len(sub_text) + len(end_line_separator) * 60 >= translation_limit) or (
-                is_last and len(text_translatable) > 0):
-                translated_text = self.translator.translate(text_translatable).replace(end_line_separator, "")
-                translated_arr = self._parse_text_to_arr(translated_text)
-                translated_arr_expected_len = sub_index - translated_subs_counter
-                if len(translated_arr) != translated_arr_expected_len:
-                    logger.warning(f"WARNING: incorrect translation: translated_arr len is {len(translated_arr)}, but should be {translated_arr_expected_len}")
-
-                for i in range(len(translated_arr)):
-                    old_sub = subtitles[translated_subs_counter + i]
-                    new_sub = Subtitle(
-                        id=old_sub.id,
-                        speaker=old_sub.speaker,
-                        start_time=old_sub.start_time,
-                        end_time=old_sub.end_time,
-                        text=translated_arr[i]
-                    )
-                    subs_translated_arr.append(new_sub)
-
-                text_translatable = ""
-                translated_subs_counter = sub_index
-                if not is_last:
-                    time.sleep(5)
-            text_translatable += sub_text + end_line_separator + "\n\n"
+                translated_line = next(translated_lines_iter)
+            new_sub = Subtitle(
+                id=old_sub.id,
+                speaker=old_sub.speaker,
+                start_time=old_sub.start_time,
+                end_time=old_sub.end_time,
+                text=translated_line
+            )
+            subs_translated_arr.append(new_sub)
+
+        if self.translation_memory is not None:
+            memory_hits_count = len(subtitles) - len(subtitles_to_translate)
+            logger.info(f"Translation memory: {memory_hits_count}/{len(subtitles)} lines found, overall hit rate {self.translation_memory.get_hit_rate():.0%}")
+
+        logger.info(f"Translated {len(subs_translated_arr)} subtitles in {len(chunks)} chunks, {self.misaligned_chunks_count} misaligned chunks retried, rate limit wait {self.rate_limit_wait_time:.1f}s, backoff {self.backoff_time:.1f}s")
         return subs_translated_arr
+
+    def _split_subtitles_to_chunks(self, subtitles: List[Subtitle], translation_limit: int, end_line_separator: str) -> List[List[Subtitle]]:
+        """
+        Groups subtitles into chunks of text no longer than translation_limit.
+        """
+        chunks = []
+        chunk_subtitles = []
+        chunk_length = 0
+        for subtitle in subtitles:
+            line_length = len(subtitle.text) + len(self._get_line_tag(len(chunk_subtitles))) + len(end_line_separator) + 2
+            if chunk_subtitles and chunk_length + line_length + len(end_line_separator) * 60 >= translation_limit:
+                chunks.append(chunk_subtitles)
+                chunk_subtitles = []
+                chunk_length = 0
+            chunk_subtitles.append(subtitle)
+            chunk_length += line_length
+        if chunk_subtitles:
+            chunks.append(chunk_subtitles)
+        return chunks
+
+    def _translate_chunk(self, chunk_subtitles: List[Subtitle], end_line_separator: str) -> List[str]:
+        """
+        Translates a chunk of subtitles and checks that every translated line belongs to its subtitle.
+        Backends with an array API get the lines as a list, other backends get the lines tagged with ids.
+        A misaligned chunk is split in halves and translated again, down to single lines.
+        """
+        texts = [subtitle.text for subtitle in chunk_subtitles]
+        if len(texts) == 1:
+            return [self._translate_text(texts[0] + end_line_separator).replace(end_line_separator, "").strip()]
+
+        if hasattr(self._get_thread_translator(), "translate_texts"):
+            translated_arr = self._translate_texts(texts)
+        else:
+            tagged_text = "".join(f"{self._get_line_tag(i)}{text}{end_line_separator}\n\n" for i, text in enumerate(texts))
+            translated_arr = self._parse_tagged_text(self._translate_text(tagged_text), len(texts), end_line_separator)
+
+        if translated_arr is not None and len(translated_arr) == len(texts):
+            return translated_arr
+
+        logger.warning(f"WARNING: incorrect translation of a chunk of {len(texts)} lines, retrying it in smaller chunks")
+        with self._metrics_lock:
+            self.misaligned_chunks_count += 1
+        middle = len(chunk_subtitles) // 2
+        return (self._translate_chunk(chunk_subtitles[:middle], end_line_separator) +
+                self._translate_chunk(chunk_subtitles[middle:], end_line_separator))
+
+    def _get_line_tag(self, line_index: int) -> str:
+        return f"[{line_index}] "
+
+    def _parse_tagged_text(self, text: str, lines_count: int, end_line_separator: str) -> List[str] | None:
+        """
+        Splits translated text by line tags. Returns None if tags are lost, merged or reordered.
+        """
+        parts = re.split(r"\[(\d+)\]", text)
+        if parts[0].strip() != "" or [int(line_id) for line_id in parts[1::2]] != list(range(lines_count)):
+            return None
+        return [part.replace(end_line_separator, "").strip() for part in parts[2::2]]
+
+    def _translate_text(self, text: str) -> str:
+        return self._request_translation(lambda translator: translator.translate(text), len(text))
+
+    def _translate_texts(self, texts: List[str]) -> List[str]:
+        return self._request_translation(lambda translator: translator.translate_texts(texts), sum(len(text) for text in texts))
+
+    def _request_translation(self, request: Callable, chars_count: int):
+        """
+        Sends a translation request within the backend rate limit. Throttled requests are retried with exponential backoff.
+        """
+        for attempt in range(ConfigSubsGen.TRANSLATE_MAX_RETRIES + 1):
+            wait_time = self.rate_limiter.acquire(chars_count)
+            with self._metrics_lock:
+                self.rate_limit_wait_time += wait_time
+            try:
+                return request(self._get_thread_translator())
+            except TooManyRequests:
+                if attempt == ConfigSubsGen.TRANSLATE_MAX_RETRIES:
+                    raise
+                # The configured rate is too high for the backend right now, start refilling from empty
+                self.rate_limiter.drain()
+                backoff = min(ConfigSubsGen.TRANSLATE_BACKOFF_BASE * 2 ** attempt, ConfigSubsGen.TRANSLATE_BACKOFF_MAX)
+                logger.warning(f"Translator is throttling requests, retrying in {backoff:.1f}s")
+                time.sleep(backoff)
+                with self._metrics_lock:
+                    self.backoff_time += backoff
@@ -1,11 +1,16 @@
 import json
 import os
+import re
 import shutil
+import time
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+
+from deep_translator.exceptions import TooManyRequests
 
 from shared_utils.sub_parser import Subtitle
 from subs_translator import SubsTranslator, Translators
+from utils.translation_memory import TranslationMemory
 
 
 class TestSubsTranslator(unittest.TestCase):
@@ -21,37 +26,14 @@ class TestSubsTranslator(unittest.TestCase):
     
     
     def tearDown(self):
+        self.translator.close()
         if os.path.exists(self.temp_folder):
             shutil.rmtree(self.temp_folder) 
         
         
-    def test_parse_text_to_arr_multiple_lines(self):
-        text = "Line 1\n\nLine 2\n\nLine 3"
-        result = self.translator._parse_text_to_arr(text)
-        self.assertEqual(result, ["Line 1", "Line 2", "Line 3"])
-        
-        
-    def test_parse_text_to_arr_with_linebreak_in_the_end(self):
-        text = "Line 1\n\nLine 2\n\nLine 3\n\n"
-        result = self.translator._parse_text_to_arr(text)
-        self.assertEqual(result, ["Line 1", "Line 2", "Line 3"])
-        
-        
-    def test_parse_text_to_arr_single_line(self):
-        text = "Line 1"
-        result = self.translator._parse_text_to_arr(text)
-        self.assertEqual(result, ["Line 1"])
-        
-        
-    def test_parse_text_to_arr_empty(self):
-        text = ""
-        result = self.translator._parse_text_to_arr(text)
-        self.assertEqual(result, [])
-        
-        
     @patch('deep_translator.GoogleTranslator.translate')
     def test_translate_subtitles(self, mock_translate):
-        mock_translate.return_value = "Translated text 1 //\n\nTranslated text 2"
+        mock_translate.return_value = "[0] Translated text 1 //\n\n[1] Translated text 2"
 
         subtitles = [
             Subtitle(id=1, speaker="Speaker 1", start_time=10, end_time=1000, text="Text 1"),
@@ -94,3 +76,135 @@ class TestSubsTranslator(unittest.TestCase):
             content = json.load(f)
             self.assertEqual(content[0]['text'], "Hello world")
 
+
+
+    @patch('subs_translator.time.sleep')
+    @patch('deep_translator.GoogleTranslator.translate')
+    def test_translate_subtitles_retries_throttled_requests(self, mock_translate, mock_sleep):
+        mock_translate.side_effect = [TooManyRequests(), TooManyRequests(), "Translated text"]
+        self.translator.rate_limiter = MagicMock(**{"acquire.return_value": 0})
+        subtitles = [Subtitle(id=1, speaker="Speaker 1", start_time=10, end_time=1000, text="Text")]
+
+        result = self.translator._translate_subtitles(subtitles, 1000000, " //")
+
+        self.assertEqual(result[0].text, "Translated text")
+        self.assertEqual(mock_translate.call_count, 3)
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [2, 4])
+        self.assertEqual(self.translator.backoff_time, 6)
+        self.assertEqual(self.translator.rate_limiter.drain.call_count, 2)
+
+
+    @patch('subs_translator.time.sleep')
+    @patch('deep_translator.GoogleTranslator.translate')
+    def test_translate_subtitles_does_not_sleep_between_chunks(self, mock_translate, mock_sleep):
+        mock_translate.side_effect = ["Translated 1", "Translated 2", "Translated 3"]
+        subtitles = [
+            Subtitle(id=i, speaker="Speaker 1", start_time=i * 1000, end_time=i * 1000 + 900, text="Text " * 10)
+            for i in range(3)
+        ]
+
+        result = self.translator._translate_subtitles(subtitles, 250, " //")
+
+        self.assertEqual([sub.text for sub in result], ["Translated 1", "Translated 2", "Translated 3"])
+        mock_sleep.assert_not_called()
+
+
+    @patch('deep_translator.GoogleTranslator.translate')
+    def test_translate_subtitles_file_writes_srt_and_json(self, mock_translate):
+        mock_translate.return_value = "[0] Hello world //\n\n[1] Goodbye"
+        temp_json_path = os.path.join(self.temp_folder, "temp_src.json")
+        temp_srt_output_path = os.path.join(self.temp_folder, "temp_out.srt")
+        temp_json_output_path = os.path.join(self.temp_folder, "temp_out.json")
+
+        with open(temp_json_path, "w") as temp_json:
+            temp_json.write('[{"id": 1, "modified": false, "speaker": "A", "start": "00:00:01,000", "end": "00:00:04,000", "text": "Hola Mundo"},'
+                            ' {"id": 2, "modified": false, "speaker": "B", "start": "00:00:05,000", "end": "00:00:06,000", "text": "Adios"}]')
+
+        self.translator.translate_subtitles_file(temp_json_path, temp_srt_output_path, temp_json_output_path)
+
+        mock_translate.assert_called_once()
+        with open(temp_srt_output_path, 'r') as f:
+            self.assertEqual(f.read(), "1\n00:00:01,000 --> 00:00:04,000\nHello world\n\n2\n00:00:05,000 --> 00:00:06,000\nGoodbye\n\n")
+        with open(temp_json_output_path, 'r') as f:
+            content = json.load(f)
+            self.assertEqual([sub['text'] for sub in content], ["Hello world", "Goodbye"])
+            self.assertEqual([sub['speaker'] for sub in content], ["A", "B"])
+
+
+    @patch('deep_translator.GoogleTranslator.translate', autospec=True)
+    def test_translate_subtitles_keeps_chunk_order(self, mock_translate):
+        def translate(translator, text):
+            # Later chunks finish first
+            chunk_index = int(re.search(r"Text (\d+)", text).group(1))
+            time.sleep(0.05 * (3 - chunk_index))
+            return text.replace("Text", "Translated")
+
+        mock_translate.side_effect = translate
+        subtitles = [
+            Subtitle(id=i, speaker="Speaker 1", start_time=i * 1000, end_time=i * 1000 + 900, text=f"Text {i // 2} {'a' * 30}")
+            for i in range(8)
+        ]
+
+        result = self.translator._translate_subtitles(subtitles, 300, " //")
+
+        self.assertEqual(mock_translate.call_count, 4)
+        self.assertEqual([sub.id for sub in result], list(range(8)))
+        self.assertEqual([sub.text for sub in result], [f"Translated {i // 2} {'a' * 30}" for i in range(8)])
+
+
+    @patch('deep_translator.GoogleTranslator.translate')
+    def test_translate_subtitles_retries_only_misaligned_chunk(self, mock_translate):
+        mock_translate.side_effect = [
+            "[0] One [1] Two //\n\n[2] Three",   # merged paragraphs, the tags are still in order
+            "[0] Four //\n\nFive [2] Six",        # tag lost
+            "Four",
+            "[0] Five //\n\n[1] Six",
+        ]
+        subtitles = [
+            Subtitle(id=i, speaker="Speaker 1", start_time=i * 1000, end_time=i * 1000 + 900, text=f"Text {i}")
+            for i in range(6)
+        ]
+
+        self.translator.close()
+        with patch('subs_translator.ConfigSubsGen.TRANSLATE_CONCURRENCY', 1):
+            self.translator = SubsTranslator(translator=Translators.google, source_lang='es', target_lang='en')
+        with patch.object(self.translator, '_split_subtitles_to_chunks', return_value=[subtitles[:3], subtitles[3:]]):
+            result = self.translator._translate_subtitles(subtitles, 1000000, " //")
+
+        self.assertEqual([sub.text for sub in result], ["One", "Two", "Three", "Four", "Five", "Six"])
+        self.assertEqual(mock_translate.call_count, 4)
+        self.assertEqual(self.translator.misaligned_chunks_count, 1)
+
+
+    @patch('utils.my_yandex_translator.MyYandexTranslator.translate_texts')
+    def test_translate_subtitles_uses_array_api(self, mock_translate_texts):
+        mock_translate_texts.return_value = ["Translated 1", "Translated 2"]
+        translator = SubsTranslator(translator=Translators.yandex, source_lang='es', target_lang='en')
+        subtitles = [
+            Subtitle(id=1, speaker="Speaker 1", start_time=10, end_time=1000, text="Text 1"),
+            Subtitle(id=2, speaker="Speaker 2", start_time=1010, end_time=2000, text="Text 2")
+        ]
+
+        result = translator._translate_subtitles(subtitles, 1000000, " //")
+        translator.close()
+
+        mock_translate_texts.assert_called_once_with(["Text 1", "Text 2"])
+        self.assertEqual([sub.text for sub in result], ["Translated 1", "Translated 2"])
+
+
+    @patch('deep_translator.GoogleTranslator.translate')
+    def test_translate_subtitles_sends_only_unseen_lines(self, mock_translate):
+        translation_memory = TranslationMemory(os.path.join(self.temp_folder, "memory.db"), max_entries=100, ttl_seconds=100)
+        translation_memory.put_many({"Intro": "Translated intro"}, "es", "en", Translators.google)
+        self.translator.translation_memory = translation_memory
+        mock_translate.return_value = "Translated text"
+
+        subtitles = [
+            Subtitle(id=1, speaker="Speaker 1", start_time=10, end_time=1000, text="Intro"),
+            Subtitle(id=2, speaker="Speaker 1", start_time=1010, end_time=2000, text="Text"),
+        ]
+        result = self.translator._translate_subtitles(subtitles, 1000000, " //")
+
+        self.assertEqual([sub.text for sub in result], ["Translated intro", "Translated text"])
+        mock_translate.assert_called_once_with("Text //")
+        self.assertEqual(translation_memory.get_many(["Text"], "es", "en", Translators.google), {"Text": "Translated text"})
@@ -1,30 +1,91 @@
+from typing import List
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from deep_translator.exceptions import TooManyRequests
 
 
 class MyYandexTranslator:
-    def __init__(self, api_key, folder_id, src_lang, dest_lang):
+    URL = 'https://translate.api.cloud.yandex.net/translate/v2/translate'
+    # API limit of characters summed over all texts of one request
+    MAX_REQUEST_CHARS = 10000
+
+    def __init__(self, api_key, folder_id, src_lang, dest_lang, timeout: float = 30, max_retries: int = 3,
+                 pool_size: int = 1, url: str = URL):
         self.api_key = api_key
         self.folder_id = folder_id
         self.src_lang = src_lang
         self.dest_lang = dest_lang
-        self.url = 'https://translate.api.cloud.yandex.net/translate/v2/translate'
+        self.url = url
+        self.timeout = timeout
+        self.session = self._create_session(max_retries, pool_size)
+
+    def close(self):
+        self.session.close()
+
+    def _create_session(self, max_retries: int, pool_size: int) -> requests.Session:
+        """
+        Keep-alive session, so the TLS handshake is made once per connection instead of once per request.
+        The translator keeps no per-request state, one instance and its session are shared by pool_size threads.
+        Connection errors and server errors are retried here, throttling (429) is left to the caller's backoff.
+        """
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=["POST"],
+            raise_on_status=False
+        )
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({'Authorization': f'Api-Key {self.api_key}'})
+        return session
 
     def translate(self, text: str):
+        return self.translate_texts([text])[0]
+
+    def translate_texts(self, texts: List[str]) -> List[str]:
+        """Translates texts keeping their order, as few requests as the API limits allow are sent."""
+        translated_texts = []
+        for batch in self._split_texts_to_batches(texts):
+            translated_texts.extend(self._translate_batch(batch))
+        return translated_texts
+
+    def _split_texts_to_batches(self, texts: List[str]) -> List[List[str]]:
+        batches = []
+        batch = []
+        batch_chars = 0
+        for text in texts:
+            if batch and batch_chars + len(text) > self.MAX_REQUEST_CHARS:
+                batches.append(batch)
+                batch = []
+                batch_chars = 0
+            batch.append(text)
+            batch_chars += len(text)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _translate_batch(self, texts: List[str]) -> List[str]:
         params = {
             'folder_id': self.folder_id,
-            'texts': [text],
+            'texts': texts,
             'sourceLanguageCode': self.src_lang,
             'targetLanguageCode': self.dest_lang,
             'format': 'PLAIN_TEXT'
         }
-        headers = {
-            'Authorization': f'Api-Key {self.api_key}'
-        }
 
-        response = requests.post(self.url, json=params, headers=headers)
-        response_data = response.json()
+        response = self.session.post(self.url, json=params, timeout=self.timeout)
+        if response.status_code == 429:
+            raise TooManyRequests()
+        try:
+            response_data = response.json()
+        except ValueError:
+            response_data = {}
 
         if 'translations' in response_data:
-            return response_data['translations'][0]['text']
+            return [translation['text'] for translation in response_data['translations']]
         else:
-            raise Exception("Error in yandex translator")
+            raise Exception(f"Error in yandex translator: {response.status_code} {response_data.get('message', '')}")
@@ -0,0 +1,47 @@
+import threading
+import time
+
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket shared by all callers of one backend: tokens are refilled at a constant rate
+    up to the bucket capacity, acquire blocks only while the bucket is empty.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill_time = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.total_wait_time = 0.0
+        self.acquired_count = 0
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Takes tokens from the bucket, waiting for refill if needed. Returns the time spent waiting."""
+        # A request larger than the bucket would never fit, it is let through once the bucket is full
+        tokens = min(tokens, self.capacity)
+        wait_time = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.total_wait_time += wait_time
+                    self.acquired_count += 1
+                    return wait_time
+                sleep_time = (tokens - self._tokens) / self.rate
+            time.sleep(sleep_time)
+            wait_time += sleep_time
+
+    def drain(self):
+        """Empties the bucket, used when the backend reports throttling despite the limiter."""
+        with self._lock:
+            self._refill()
+            self._tokens = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill_time) * self.rate)
+        self._last_refill_time = now
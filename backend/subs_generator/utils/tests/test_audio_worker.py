@@ -1,25 +1,46 @@
 import shutil
+import subprocess
 import unittest
 import os
+import soundfile as sf
+from moviepy.config import get_setting
 from moviepy.editor import VideoFileClip, AudioFileClip
 
 from utils.audio_worker import extract_audio_from_video, inject_audio_in_video
 
 
+def generate_sample_video(video_path: str, duration: int):
+    subprocess.run([
+        get_setting("FFMPEG_BINARY"), "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc=size=320x240:rate=25:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac",
+        video_path,
+    ], check=True)
+
+
+def generate_sample_audio(audio_path: str, duration: int):
+    subprocess.run([
+        get_setting("FFMPEG_BINARY"), "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"sine=frequency=880:duration={duration}",
+        audio_path,
+    ], check=True)
+
+
 class TestVideoAudioUtils(unittest.TestCase):
     def setUp(self):
         self.temp_folder = "temp_2"
         os.makedirs(self.temp_folder)
-        self.test_video_path = os.path.joun(self.temp_folder, 'test_video.mp4')
-        self.test_audio_path = os.path.joun(self.temp_folder, 'test_audio.wav')
-        self.output_video_path = os.path.joun(self.temp_folder, 'output_video.mp4')
-        self.output_audio_path = os.path.joun(self.temp_folder, 'output_audio.wav')
+        self.test_video_path = os.path.join(self.temp_folder, 'test_video.mp4')
+        self.test_audio_path = os.path.join(self.temp_folder, 'test_audio.wav')
+        self.output_video_path = os.path.join(self.temp_folder, 'output_video.mp4')
+        self.output_audio_path = os.path.join(self.temp_folder, 'output_audio.wav')
 
-        VideoFileClip.create_black_video(self.test_video_path, duration=5)
-        AudioFileClip.create_silent_audio(self.test_audio_path, duration=5)
+        generate_sample_video(self.test_video_path, duration=5)
+        generate_sample_audio(self.test_audio_path, duration=5)
 
     def tearDown(self):
-        if os.path.exists(self.output_video_path):
+        if os.path.exists(self.temp_folder):
             shutil.rmtree(self.temp_folder)
 
     def test_inject_audio_in_video(self):
@@ -38,3 +59,7 @@ class TestVideoAudioUtils(unittest.TestCase):
         output_audio = AudioFileClip(self.output_audio_path)
         self.assertAlmostEqual(output_audio.duration, 5, delta=0.1)
         output_audio.close()
+
+        output_audio_info = sf.info(self.output_audio_path)
+        self.assertEqual(output_audio_info.samplerate, 24000)
+        self.assertEqual(output_audio_info.channels, 1)
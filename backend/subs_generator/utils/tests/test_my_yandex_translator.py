@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from deep_translator.exceptions import TooManyRequests
+
+from utils.my_yandex_translator import MyYandexTranslator
+
+
+class YandexStandInHandler(BaseHTTPRequestHandler):
+    """Answers like the translate API: every text is upper-cased. Status codes can be queued by the test."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server.requests.append({"client_port": self.client_address[1], "body": body, "auth": self.headers["Authorization"]})
+
+        if server.delay:
+            time.sleep(server.delay)
+        status = server.statuses.pop(0) if server.statuses else 200
+        if status == 200:
+            response = {"translations": [{"text": text.upper()} for text in body["texts"]]}
+        else:
+            response = {"message": "error"}
+
+        response_bytes = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response_bytes)))
+        self.end_headers()
+        self.wfile.write(response_bytes)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestMyYandexTranslator(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), YandexStandInHandler)
+        self.server.requests = []
+        self.server.statuses = []
+        self.server.delay = 0
+        # Connections dropped by client timeouts are expected
+        self.server.handle_error = lambda request, client_address: None
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+
+        self.translator = MyYandexTranslator(
+            api_key="key",
+            folder_id="folder",
+            src_lang="es",
+            dest_lang="en",
+            timeout=2,
+            max_retries=2,
+            pool_size=4,
+            url=f"http://127.0.0.1:{self.server.server_address[1]}/translate"
+        )
+
+    def tearDown(self):
+        self.translator.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_texts_are_batched_and_connection_is_reused(self):
+        texts = [f"text {i} " + "a" * 3000 for i in range(7)]
+
+        translated_texts = self.translator.translate_texts(texts)
+
+        self.assertEqual(translated_texts, [text.upper() for text in texts])
+        self.assertEqual([len(request["body"]["texts"]) for request in self.server.requests], [3, 3, 1])
+        self.assertEqual(len({request["client_port"] for request in self.server.requests}), 1)
+        self.assertEqual(self.server.requests[0]["auth"], "Api-Key key")
+        self.assertEqual(self.server.requests[0]["body"]["folder_id"], "folder")
+
+    def test_session_is_shared_between_threads(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            translated_texts = list(executor.map(self.translator.translate, [f"text {i}" for i in range(40)]))
+
+        self.assertEqual(translated_texts, [f"TEXT {i}" for i in range(40)])
+        # Connections are kept alive and reused, at most one per thread
+        self.assertLessEqual(len({request["client_port"] for request in self.server.requests}), 4)
+
+    def test_translate_single_text(self):
+        self.assertEqual(self.translator.translate("hola"), "HOLA")
+
+    def test_server_errors_are_retried(self):
+        self.server.statuses = [503, 502]
+        self.assertEqual(self.translator.translate("hola"), "HOLA")
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_throttling_is_raised(self):
+        self.server.statuses = [429]
+        with self.assertRaises(TooManyRequests):
+            self.translator.translate("hola")
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_timeout(self):
+        self.translator.timeout = 0.2
+        self.server.delay = 0.5
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.translator.translate("hola")
@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import patch
+
+from utils.rate_limiter import TokenBucketRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucketRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch.multiple('utils.rate_limiter.time', monotonic=self.clock.monotonic, sleep=self.clock.sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_does_not_wait(self):
+        rate_limiter = TokenBucketRateLimiter(rate=100, capacity=1000)
+        self.assertEqual(rate_limiter.acquire(600), 0)
+        self.assertEqual(rate_limiter.acquire(400), 0)
+        self.assertEqual(rate_limiter.total_wait_time, 0)
+
+    def test_waits_for_refill_when_empty(self):
+        rate_limiter = TokenBucketRateLimiter(rate=100, capacity=1000)
+        rate_limiter.acquire(1000)
+
+        self.assertAlmostEqual(rate_limiter.acquire(500), 5)
+        self.clock.now += 2
+        self.assertAlmostEqual(rate_limiter.acquire(500), 3)
+        self.assertAlmostEqual(rate_limiter.total_wait_time, 8)
+        self.assertEqual(rate_limiter.acquired_count, 3)
+
+    def test_request_larger_than_capacity_waits_for_full_bucket(self):
+        rate_limiter = TokenBucketRateLimiter(rate=100, capacity=1000)
+        rate_limiter.acquire(1000)
+        self.assertAlmostEqual(rate_limiter.acquire(5000), 10)
+
+    def test_drain_empties_bucket(self):
+        rate_limiter = TokenBucketRateLimiter(rate=100, capacity=1000)
+        rate_limiter.drain()
+        self.assertAlmostEqual(rate_limiter.acquire(100), 1)
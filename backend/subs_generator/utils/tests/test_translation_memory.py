@@ -0,0 +1,53 @@
+import os
+import shutil
+import unittest
+from unittest.mock import patch
+
+from utils.translation_memory import TranslationMemory
+
+
+class TestTranslationMemory(unittest.TestCase):
+    def setUp(self):
+        self.temp_folder = "temp_translation_memory"
+        self.translation_memory = TranslationMemory(
+            db_filepath=os.path.join(self.temp_folder, "memory.db"),
+            max_entries=10,
+            ttl_seconds=100
+        )
+
+    def tearDown(self):
+        if os.path.exists(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+    def test_put_and_get(self):
+        self.translation_memory.put_many({"Hola": "Hello", "Adios": "Goodbye"}, "es", "en", "google")
+
+        found = self.translation_memory.get_many(["Hola", "Adios", "Gracias"], "es", "en", "google")
+
+        self.assertEqual(found, {"Hola": "Hello", "Adios": "Goodbye"})
+        self.assertAlmostEqual(self.translation_memory.get_hit_rate(), 2 / 3)
+
+    def test_key_includes_languages_and_backend(self):
+        self.translation_memory.put_many({"Hola": "Hello"}, "es", "en", "google")
+
+        self.assertEqual(self.translation_memory.get_many(["Hola"], "es", "de", "google"), {})
+        self.assertEqual(self.translation_memory.get_many(["Hola"], "es", "en", "yandex"), {})
+
+    def test_expired_entries_are_not_returned(self):
+        with patch('utils.translation_memory.time.time', return_value=1000):
+            self.translation_memory.put_many({"Hola": "Hello"}, "es", "en", "google")
+        with patch('utils.translation_memory.time.time', return_value=1101):
+            self.assertEqual(self.translation_memory.get_many(["Hola"], "es", "en", "google"), {})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for i in range(10):
+            with patch('utils.translation_memory.time.time', return_value=1000 + i):
+                self.translation_memory.put_many({f"text {i}": f"translation {i}"}, "es", "en", "google")
+        with patch('utils.translation_memory.time.time', return_value=1010):
+            self.translation_memory.get_many(["text 0"], "es", "en", "google")
+        with patch('utils.translation_memory.time.time', return_value=1011):
+            self.translation_memory.put_many({"text 10": "translation 10"}, "es", "en", "google")
+
+            found = self.translation_memory.get_many([f"text {i}" for i in range(11)], "es", "en", "google")
+
+        self.assertEqual(sorted(found), sorted(["text 0", "text 10"] + [f"text {i}" for i in range(3, 10)]))
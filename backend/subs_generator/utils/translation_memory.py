@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class TranslationMemory:
+    """
+    SQLite store of already translated lines shared between tasks, keyed by source text, languages and backend.
+    Entries expire after ttl_seconds, when the store grows over max_entries the least recently used entries are evicted.
+    """
+    EVICT_TO_RATIO = 0.9
+
+    def __init__(self, db_filepath: str, max_entries: int, ttl_seconds: float):
+        self.db_filepath = db_filepath
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits_count = 0
+        self.lookups_count = 0
+
+        db_folder = os.path.dirname(db_filepath)
+        if db_folder:
+            os.makedirs(db_folder, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, translation TEXT NOT NULL, created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used_at ON translations (last_used_at)")
+
+    @staticmethod
+    def make_key(text: str, source_lang: str, target_lang: str, backend: str) -> str:
+        key_data = json.dumps([text, source_lang, target_lang, backend], ensure_ascii=False)
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str], source_lang: str, target_lang: str, backend: str) -> Dict[str, str]:
+        """Returns translations of the texts found in the memory, keyed by source text."""
+        keys = {self.make_key(text, source_lang, target_lang, backend): text for text in set(texts)}
+        now = time.time()
+        found = {}
+        with self._lock, self._connect() as connection:
+            key_list = list(keys)
+            # SQLite limits the number of query parameters
+            for i in range(0, len(key_list), 500):
+                keys_batch = key_list[i:i + 500]
+                rows = connection.execute(
+                    f"SELECT key, translation FROM translations WHERE created_at > ? AND key IN ({','.join('?' * len(keys_batch))})",
+                    [now - self.ttl_seconds, *keys_batch]
+                ).fetchall()
+                for key, translation in rows:
+                    found[keys[key]] = translation
+                connection.executemany(
+                    "UPDATE translations SET last_used_at = ? WHERE key = ?",
+                    [(now, key) for key, _ in rows]
+                )
+            self.lookups_count += len(texts)
+            self.hits_count += sum(1 for text in texts if text in found)
+        return found
+
+    def put_many(self, translations: Dict[str, str], source_lang: str, target_lang: str, backend: str):
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                [(self.make_key(text, source_lang, target_lang, backend), translation, now, now)
+                 for text, translation in translations.items()]
+            )
+            self._evict(connection, now)
+
+    def get_hit_rate(self) -> float:
+        if self.lookups_count == 0:
+            return 0.0
+        return self.hits_count / self.lookups_count
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        connection.execute("DELETE FROM translations WHERE created_at <= ?", (now - self.ttl_seconds,))
+        entries_count = connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if entries_count > self.max_entries:
+            connection.execute(
+                "DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY last_used_at LIMIT ?)",
+                (entries_count - int(self.max_entries * self.EVICT_TO_RATIO),)
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A connection per operation, so the memory can be used from translation pool threads
+        connection = sqlite3.connect(self.db_filepath, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
@@ -0,0 +1,71 @@
+"""
+Compares AudioMixer with the pydub AudioSegment.overlay merge it replaced.
+
+Run from the voice_generator folder:
+    python -m benchmarks.benchmark_audio_mixer --clips 100 1000 5000
+"""
+import argparse
+import time
+
+import numpy as np
+from pydub import AudioSegment
+
+from utils.audio_mixer import AudioMixer
+
+
+SAMPLE_RATE = 24000
+CLIP_DURATION_MS = 2000
+CLIP_STEP_MS = 2500
+
+
+def generate_clips(clips_count: int) -> list:
+    rng = np.random.default_rng(0)
+    clip_length = CLIP_DURATION_MS * SAMPLE_RATE // 1000
+    clips = []
+    for i in range(clips_count):
+        clip = (rng.standard_normal(clip_length) * 3000).astype(np.int16)
+        clips.append((i * CLIP_STEP_MS, clip))
+    return clips
+
+
+def merge_with_overlay(clips: list, duration_ms: int) -> float:
+    start_time = time.perf_counter()
+    final_audio = AudioSegment.silent(duration=duration_ms, frame_rate=SAMPLE_RATE)
+    for position_ms, clip in clips:
+        segment = AudioSegment(clip.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=1)
+        final_audio = final_audio.overlay(segment, position=position_ms)
+    return time.perf_counter() - start_time
+
+
+def merge_with_mixer(clips: list, duration_ms: int, dtype: str) -> float:
+    start_time = time.perf_counter()
+    audio_mixer = AudioMixer(duration_ms=duration_ms, sample_rate=SAMPLE_RATE, dtype=dtype)
+    for position_ms, clip in clips:
+        audio_mixer.add_clip(clip, position_ms)
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--overlay-max-clips", type=int, default=1000,
+                        help="Skip the overlay merge above this clips count, it grows quadratically")
+    args = parser.parse_args()
+
+    print(f"{'clips':>8} {'audio min':>10} {'overlay s':>10} {'mixer f32 s':>12} {'mixer i16 s':>12}")
+    for clips_count in args.clips:
+        clips = generate_clips(clips_count)
+        duration_ms = clips[-1][0] + CLIP_DURATION_MS + 1000
+
+        if clips_count <= args.overlay_max_clips:
+            overlay_time = f"{merge_with_overlay(clips, duration_ms):10.2f}"
+        else:
+            overlay_time = f"{'skipped':>10}"
+        mixer_f32_time = merge_with_mixer(clips, duration_ms, "float32")
+        mixer_i16_time = merge_with_mixer(clips, duration_ms, "int16")
+
+        print(f"{clips_count:>8} {duration_ms / 60000:10.1f} {overlay_time} {mixer_f32_time:12.3f} {mixer_i16_time:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
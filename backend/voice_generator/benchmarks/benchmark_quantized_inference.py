@@ -0,0 +1,98 @@
+"""
+Compares fp32 and dynamic int8 XTTS inference on CPU: real-time factor of every mode
+and duration/energy similarity of int8 output to the fp32 output for the same sentences.
+
+Run from the voice_generator folder:
+    python -m benchmarks.benchmark_quantized_inference --speaker-wav speaker.wav --language en
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from voice_generator import VoiceGenerator
+
+
+SAMPLE_SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Please make sure to save your work before closing the application.",
+    "It was the best of times, it was the worst of times.",
+    "Our next stop is the central station, doors will open on the left side.",
+    "Thank you for watching, see you in the next video!",
+]
+ENVELOPE_FRAME_MS = 20
+ENVELOPE_POINTS = 200
+
+
+def synthesize_sentences(voice_generator: VoiceGenerator, speaker_wav: str, language: str, seed: int):
+    """Returns synthesized wavs and real-time factor of every sentence."""
+    gpt_cond_latent, speaker_embedding = voice_generator._get_speaker_conditioning(speaker_wav)
+    wavs = []
+    real_time_factors = []
+    for sentence in SAMPLE_SENTENCES:
+        # XTTS samples tokens, the same seed keeps fp32 and int8 runs comparable
+        torch.manual_seed(seed)
+        start_time = time.perf_counter()
+        wav = voice_generator._synthesize_text(sentence, gpt_cond_latent, speaker_embedding, language)
+        synthesis_time = time.perf_counter() - start_time
+        wavs.append(wav)
+        real_time_factors.append(synthesis_time * voice_generator.sample_rate / len(wav))
+    return wavs, real_time_factors
+
+
+def get_energy_envelope(wav: np.ndarray, sample_rate: int) -> np.ndarray:
+    frame_length = sample_rate * ENVELOPE_FRAME_MS // 1000
+    frames_count = len(wav) // frame_length
+    frames = wav[:frames_count * frame_length].reshape(frames_count, frame_length)
+    envelope = np.sqrt(np.mean(np.square(frames), axis=1))
+    # Resample to a fixed length, so clips of different duration are comparable
+    return np.interp(np.linspace(0, frames_count - 1, ENVELOPE_POINTS), np.arange(frames_count), envelope)
+
+
+def compare_wavs(reference_wav: np.ndarray, wav: np.ndarray, sample_rate: int) -> tuple:
+    """Returns duration ratio, RMS energy difference in dB and energy envelope correlation."""
+    duration_ratio = len(wav) / len(reference_wav)
+    reference_rms = np.sqrt(np.mean(np.square(reference_wav)))
+    rms = np.sqrt(np.mean(np.square(wav)))
+    energy_diff_db = 20 * np.log10(rms / reference_rms)
+    envelope_correlation = np.corrcoef(
+        get_energy_envelope(reference_wav, sample_rate),
+        get_energy_envelope(wav, sample_rate)
+    )[0, 1]
+    return duration_ratio, energy_diff_db, envelope_correlation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--speaker-wav", required=True, help="Speaker reference wav")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = {}
+    for inference_mode in VoiceGenerator.INFERENCE_MODES:
+        voice_generator = VoiceGenerator(pool_size=0, inference_mode=inference_mode)
+        # Warm-up run, the first inference allocates caches
+        synthesize_sentences(voice_generator, args.speaker_wav, args.language, args.seed)
+        results[inference_mode] = synthesize_sentences(voice_generator, args.speaker_wav, args.language, args.seed)
+        sample_rate = voice_generator.sample_rate
+        del voice_generator
+
+    fp32_wavs, fp32_rtfs = results["fp32"]
+    int8_wavs, int8_rtfs = results["int8"]
+    print(f"{'sentence':>8} {'fp32 RTF':>9} {'int8 RTF':>9} {'duration':>9} {'energy dB':>10} {'envelope r':>11}")
+    similarities = []
+    for i, (fp32_wav, int8_wav) in enumerate(zip(fp32_wavs, int8_wavs)):
+        duration_ratio, energy_diff_db, envelope_correlation = compare_wavs(fp32_wav, int8_wav, sample_rate)
+        similarities.append((duration_ratio, energy_diff_db, envelope_correlation))
+        print(f"{i:>8} {fp32_rtfs[i]:9.2f} {int8_rtfs[i]:9.2f} {duration_ratio:9.2f} {energy_diff_db:10.2f} {envelope_correlation:11.2f}")
+
+    mean_similarity = np.mean(similarities, axis=0)
+    print(f"{'mean':>8} {np.mean(fp32_rtfs):9.2f} {np.mean(int8_rtfs):9.2f} "
+          f"{mean_similarity[0]:9.2f} {mean_similarity[1]:10.2f} {mean_similarity[2]:11.2f}")
+    print(f"int8 speedup: {np.mean(fp32_rtfs) / np.mean(int8_rtfs):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
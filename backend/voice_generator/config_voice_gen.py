@@ -0,0 +1,45 @@
+import os
+
+
+class ConfigVoiceGen:
+    # Max number of subtitles of one speaker synthesized with a single conditioning
+    SYNTHESIS_BATCH_SIZE = int(os.getenv("VOICE_GEN_BATCH_SIZE", 16))
+    # Number of speaker conditioning latents kept in memory
+    SPEAKER_LATENTS_CACHE_SIZE = int(os.getenv("VOICE_GEN_SPEAKER_LATENTS_CACHE_SIZE", 32))
+    # Sample type of the mix buffer: "float32" (exact sums, clipped on export) or "int16" (half the memory)
+    MIX_BUFFER_DTYPE = os.getenv("VOICE_GEN_MIX_BUFFER_DTYPE", "float32")
+    # Keep the mix buffer in a memory-mapped file in the task temp folder instead of RAM
+    MIX_BUFFER_USE_MEMMAP = os.getenv("VOICE_GEN_MIX_BUFFER_USE_MEMMAP", "false").lower() == "true"
+    # Number of model-holding synthesis processes, 0 or 1 synthesizes in the worker process itself
+    SYNTHESIS_POOL_SIZE = int(os.getenv("VOICE_GEN_POOL_SIZE", 0))
+    # torch threads of every synthesis process, 0 splits CPU cores evenly between processes
+    SYNTHESIS_POOL_THREADS_PER_WORKER = int(os.getenv("VOICE_GEN_POOL_THREADS_PER_WORKER", 0))
+    # Threads time-stretching synthesized clips while the model keeps synthesizing
+    PIPELINE_STRETCH_WORKERS = int(os.getenv("VOICE_GEN_PIPELINE_STRETCH_WORKERS", 2))
+    # Longer lines are split at sentence/phrase boundaries and synthesized piece by piece,
+    # which bounds XTTS memory and latency per call. Pieces are joined with a crossfade
+    SYNTHESIS_MAX_CHUNK_LENGTH = int(os.getenv("VOICE_GEN_SYNTHESIS_MAX_CHUNK_LENGTH", 180))
+    SYNTHESIS_CHUNK_CROSSFADE_MS = int(os.getenv("VOICE_GEN_SYNTHESIS_CHUNK_CROSSFADE_MS", 30))
+    # Allowed time-stretch ratios (stretched / natural speech duration). Clips needing stronger
+    # compression borrow time from the gap before the next subtitle
+    STRETCH_MIN_RATIO = float(os.getenv("VOICE_GEN_STRETCH_MIN_RATIO", 0.5))
+    STRETCH_MAX_RATIO = float(os.getenv("VOICE_GEN_STRETCH_MAX_RATIO", 2.0))
+    # Max number of clips waiting in front of every pipeline stage
+    PIPELINE_QUEUE_SIZE = int(os.getenv("VOICE_GEN_PIPELINE_QUEUE_SIZE", 16))
+    # Seconds between pipeline queue depth and busy time logs
+    PIPELINE_METRICS_INTERVAL = float(os.getenv("VOICE_GEN_PIPELINE_METRICS_INTERVAL", 30))
+    # Content-addressed cache of stretched clips shared between tasks
+    SYNTHESIS_CACHE_FOLDER = os.getenv("VOICE_GEN_SYNTHESIS_CACHE_FOLDER", os.path.join("uploads", "synthesis_cache"))
+    SYNTHESIS_CACHE_MAX_SIZE_MB = int(os.getenv("VOICE_GEN_SYNTHESIS_CACHE_MAX_SIZE_MB", 2048))
+    # Number of finished clips between writes of the task checkpoint a redelivered task resumes from
+    CHECKPOINT_INTERVAL = int(os.getenv("VOICE_GEN_CHECKPOINT_INTERVAL", 10))
+    # Keep the unclipped float32 mix of every task memory-mapped on disk (4 bytes per sample) and only
+    # subtract/add changed clips in place on the next run. Requires float32 mix buffer.
+    INCREMENTAL_MERGE = os.getenv("VOICE_GEN_INCREMENTAL_MERGE", "true").lower() == "true"
+    # Connect to RabbitMQ first and load the model in a background thread
+    LAZY_MODEL_LOADING = os.getenv("VOICE_GEN_LAZY_MODEL_LOADING", "true").lower() == "true"
+    # Folder with the pickled ready-to-use model (about 2 GB), written once after the first regular load.
+    # Empty disables it. Put it on the uploads volume to survive container recreates, e.g. uploads/model_checkpoints
+    MODEL_CHECKPOINT_FOLDER = os.getenv("VOICE_GEN_MODEL_CHECKPOINT_FOLDER", "")
+    # "fp32" or "int8": dynamic int8 quantization of the XTTS GPT linear layers, CPU only
+    INFERENCE_MODE = os.getenv("VOICE_GEN_INFERENCE_MODE", "fp32")
@@ -1,14 +1,19 @@
 import os
+import signal
+import sys
+import threading
+import time
+from functools import partial
 import pika
 from config_rabbitmq import ConfigRabbitMQ
+from config_voice_gen import ConfigVoiceGen
 from shared_utils.rabbitmq_base import RabbitMQBase
 from shared_utils.task_status_enum import TaskStatus
 from shared_utils.file_utils import get_task_folder
-from shared_utils.queue_tasks import RabbitMqOperationTypes, ResultsQueueItem, VoiceGenQueueItem, VoiceGenResultsItem
+from shared_utils.progress_reporter import ProgressReporter
+from shared_utils.queue_tasks import RabbitMqOperationTypes, ResultsQueueItem, TaskProgress, VoiceGenQueueItem, VoiceGenResultsItem
 from logging_conf import setup_logging
 from voice_generator import VoiceGenerator
-from pika.adapters.blocking_connection import BlockingChannel
-from pika.spec import Basic, BasicProperties
 
 
 logger = setup_logging()
@@ -20,22 +25,35 @@ RABBITMQ_PASSWORD = os.getenv('RABBITMQ_PASSWORD', 'guest')
 
 class RabbitMQVoiceGenWorker(RabbitMQBase):
     def __init__(self):
-        self.voice_generator = VoiceGenerator()
+        connect_start_time = time.perf_counter()
         super().__init__(rabbitmq_host=RABBITMQ_HOST, username=RABBITMQ_USER, password=RABBITMQ_PASSWORD)
         self.channel.queue_declare(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, durable=True)
         self.channel.queue_declare(queue=ConfigRabbitMQ.RABBITMQ_VOICE_GEN_QUEUE, durable=True)
-        logger.info("RabbitMQ voice gen worker connected")
+        logger.info(f"RabbitMQ voice gen worker connected in {time.perf_counter() - connect_start_time:.2f}s")
+        # With lazy loading tasks are accepted right away and wait for the model in generate_audio
+        self.voice_generator = VoiceGenerator(lazy_load=ConfigVoiceGen.LAZY_MODEL_LOADING)
+        # One model synthesizes one task at a time, concurrent tasks overlap the rest of the work (muxing, acks)
+        self._voice_generator_lock = threading.Lock()
         
     def watch_voice_gen_queue(self):
         while True:
             try:
-                self.channel.basic_consume(queue=ConfigRabbitMQ.RABBITMQ_VOICE_GEN_QUEUE, on_message_callback=self._callback)
-                logger.info('Starting to voice_gen queue')
-                self.channel.start_consuming()
+                logger.info(f'Starting to voice_gen queue, concurrency {ConfigRabbitMQ.VOICE_GEN_WORKER_CONCURRENCY}')
+                self.consume_concurrently(
+                    queue=ConfigRabbitMQ.RABBITMQ_VOICE_GEN_QUEUE,
+                    process_message=self._process_message,
+                    concurrency=ConfigRabbitMQ.VOICE_GEN_WORKER_CONCURRENCY
+                )
             except Exception as e:
                 logger.error(f"Error while consuming results queue: {e}")
                 self._reconnect()
 
+    def close(self):
+        try:
+            self.voice_generator.close()
+        finally:
+            super().close()
+
     def _reconnect(self):
         super()._reconnect()
         self.watch_voice_gen_queue()
@@ -47,8 +65,21 @@ class RabbitMQVoiceGenWorker(RabbitMQBase):
             body=body_json,
             properties=pika.BasicProperties(delivery_mode=2,)  # make message persistent
         )
+
+    def _publish_message_threadsafe(self, queue: str, body_json: str):
+        # Tasks run on job threads, the channel may only be used by the connection thread
+        self.run_in_connection_thread(partial(self._publish_message, queue=queue, body_json=body_json))
+
+    def _publish_progress(self, task_id: str, progress: TaskProgress):
+        message = ResultsQueueItem(
+            task_id=task_id,
+            op_type=RabbitMqOperationTypes.VOICE_GEN,
+            op_status=TaskStatus.PROCESSING,
+            progress=progress
+        )
+        self._publish_message_threadsafe(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=message.to_json())
     
-    def _callback(self, ch: BlockingChannel, method: Basic.Deliver, properties: BasicProperties, body: str | bytes):
+    def _process_message(self, body: str | bytes):
         task_item = VoiceGenQueueItem.from_json(body)
         logger.debug(f"Received task: {task_item.task_id}")
         
@@ -59,7 +90,7 @@ class RabbitMQVoiceGenWorker(RabbitMQBase):
         )
         
         logger.debug(f"Sending task {task_item.task_id} to res queue with status {return_message.op_status.name}")   
-        self._publish_message(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=return_message.to_json())
+        self._publish_message_threadsafe(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=return_message.to_json())
         logger.debug(f"Task sent to queue")   
         
         try:
@@ -72,9 +103,8 @@ class RabbitMQVoiceGenWorker(RabbitMQBase):
             return_message.op_status = TaskStatus.ERROR
         
         logger.debug(f"Sending task {task_item.task_id} to res queue with status {return_message.op_status.name}")    
-        self._publish_message(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=return_message.to_json())
+        self._publish_message_threadsafe(queue=ConfigRabbitMQ.RABBITMQ_RESULTS_QUEUE, body_json=return_message.to_json())
         logger.debug(f"Task sent to queue")   
-        ch.basic_ack(delivery_tag=method.delivery_tag)
     
     def _generate_voice(self, task: VoiceGenQueueItem) -> VoiceGenResultsItem:
         files_exists = os.path.exists(task.json_subs_path) & os.path.exists(task.src_audio_path) & os.path.exists(task.src_video_path)
@@ -88,12 +118,19 @@ class RabbitMQVoiceGenWorker(RabbitMQBase):
         final_audio_filepath = os.path.join(task_folder, f"{task.task_id}_audio_{task.lang_to}.wav")
         final_video_filepath = os.path.join(task_folder, f"{task.task_id}_vid_{task.lang_to}.mp4")
 
-        self.voice_generator.generate_audio(
-            orig_wav_filepath=task.src_audio_path,
-            language=task.lang_to,
-            json_subs_filepath=task.json_subs_path,
-            out_wav_filepath=final_audio_filepath,
-            )
+        progress_reporter = ProgressReporter(
+            publish=partial(self._publish_progress, task.task_id),
+            min_interval=ConfigRabbitMQ.PROGRESS_MESSAGES_INTERVAL
+        )
+        with self._voice_generator_lock:
+            self.voice_generator.generate_audio(
+                orig_wav_filepath=task.src_audio_path,
+                language=task.lang_to,
+                json_subs_filepath=task.json_subs_path,
+                out_wav_filepath=final_audio_filepath,
+                progress_callback=progress_reporter.update
+                )
+        progress_reporter.update("muxing", 0, 1)
         self.voice_generator.replace_audio_in_video(
             in_audio_path=final_audio_filepath,
             in_video_path=task.src_video_path,
@@ -109,5 +146,10 @@ class RabbitMQVoiceGenWorker(RabbitMQBase):
 
 
 if __name__ == "__main__":
+    # docker stop sends SIGTERM, exiting through SystemExit lets the worker shut the synthesis pool down
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     worker = RabbitMQVoiceGenWorker()
-    worker.watch_voice_gen_queue()
+    try:
+        worker.watch_voice_gen_queue()
+    finally:
+        worker.close()
@@ -0,0 +1,95 @@
+from typing import List
+
+import numpy as np
+import soundfile as sf
+
+
+class AudioMixer:
+    """
+    Mixes mono clips into a single preallocated track.
+    Every clip is added in place at its sample offset, so mixing N clips costs
+    O(total clips length) instead of copying the whole track per clip.
+    """
+    INT16_MAX = 32767
+    INT16_MIN = -32768
+    EXPORT_BLOCK_SECONDS = 60
+
+    def __init__(self, duration_ms: int, sample_rate: int, dtype: str = "float32", memmap_filepath: str | None = None):
+        if dtype not in ("float32", "int16"):
+            raise ValueError(f"Unsupported mix buffer dtype: {dtype}")
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+
+        length = self.ms_to_samples(duration_ms)
+        if memmap_filepath is not None:
+            self.track = np.memmap(memmap_filepath, dtype=self.dtype, mode="w+", shape=(length,))
+        else:
+            self.track = np.zeros(length, dtype=self.dtype)
+
+    @classmethod
+    def from_track(cls, track: np.ndarray, sample_rate: int) -> "AudioMixer":
+        """Wraps an already mixed track without copying it."""
+        audio_mixer = cls.__new__(cls)
+        audio_mixer.sample_rate = sample_rate
+        audio_mixer.dtype = track.dtype
+        audio_mixer.track = track
+        return audio_mixer
+
+    def add_clip(self, clip: np.ndarray, position_ms: int):
+        """Adds clip to the track at position_ms. Parts of the clip outside the track are dropped."""
+        start = self.ms_to_samples(position_ms)
+        end = min(start + len(clip), len(self.track))
+        if end <= start:
+            return
+        clip = self._convert_clip(clip[:end - start])
+
+        if self.dtype == np.int16:
+            mixed = self.track[start:end].astype(np.int32) + clip
+            self.track[start:end] = np.clip(mixed, self.INT16_MIN, self.INT16_MAX)
+        else:
+            self.track[start:end] += clip
+
+    def subtract_clip(self, clip: np.ndarray, position_ms: int):
+        """Removes a clip previously added at position_ms. Only float32 buffers keep exact sums to subtract from."""
+        if self.dtype != np.float32:
+            raise ValueError("Clips can be subtracted only from float32 mix buffer")
+        self.add_clip(-self._convert_clip(clip), position_ms)
+
+    def export_wav(self, output_filepath: str):
+        """Writes the track as 16-bit PCM block by block, so a memory-mapped track is never loaded as a whole."""
+        block_length = self.EXPORT_BLOCK_SECONDS * self.sample_rate
+        with sf.SoundFile(output_filepath, "w", samplerate=self.sample_rate, channels=1, subtype="PCM_16") as output_file:
+            for start in range(0, len(self.track), block_length):
+                block = self.track[start:start + block_length]
+                if self.dtype != np.int16:
+                    block = np.clip(block, -1.0, 1.0)
+                output_file.write(block)
+
+    @staticmethod
+    def crossfade_join(clips: List[np.ndarray], crossfade_length: int) -> np.ndarray:
+        """Concatenates float clips, every clip overlaps the previous one by crossfade_length samples with linear fades."""
+        joined = np.zeros(sum(len(clip) for clip in clips), dtype=np.float32)
+        position = 0
+        for clip in clips:
+            overlap = min(crossfade_length, len(clip), position)
+            start = position - overlap
+            if overlap > 0:
+                fade_in = np.linspace(0.0, 1.0, overlap + 2, dtype=np.float32)[1:-1]
+                joined[start:position] *= fade_in[::-1]
+                joined[start:position] += clip[:overlap] * fade_in
+            joined[position:start + len(clip)] = clip[overlap:]
+            position = start + len(clip)
+        return joined[:position]
+
+    def ms_to_samples(self, time_ms: int) -> int:
+        return time_ms * self.sample_rate // 1000
+
+    def _convert_clip(self, clip: np.ndarray) -> np.ndarray:
+        if self.dtype == np.int16:
+            if clip.dtype == np.int16:
+                return clip.astype(np.int32)
+            return np.round(np.clip(clip, -1.0, 1.0) * self.INT16_MAX).astype(np.int32)
+
+        if clip.dtype == np.int16:
+            return clip.astype(np.float32) / (self.INT16_MAX + 1)
+        return clip.astype(np.float32, copy=False)
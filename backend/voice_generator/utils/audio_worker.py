@@ -1,10 +1,29 @@
+import subprocess
+from moviepy.config import get_setting
 from moviepy.editor import VideoFileClip, AudioFileClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 
+from logging_conf import setup_logging
 
-def inject_audio_in_video(in_audio_path: str, in_video_path: str, out_video_path: str, video_bitrate: str = '5000k'):
+
+logger = setup_logging()
+
+
+def inject_audio_in_video(in_audio_path: str, in_video_path: str, out_video_path: str, video_bitrate: str = '5000k', copy_video_stream: bool = True):
     """
-    Replaces audio in video and saves result in .mp4
+    Replaces audio in video and saves result in .mp4.
+    By default the original video stream is copied untouched and only the new audio is encoded.
+    The video is re-encoded only if its codec can not be stream copied into .mp4.
     """
+    if copy_video_stream:
+        try:
+            mux_audio_in_video(in_audio_path, in_video_path, out_video_path)
+            return
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"Can not copy video stream of {in_video_path}, re-encoding it. ffmpeg error: {e.stderr}")
+        except IOError as e:
+            logger.warning(f"Can not read video info of {in_video_path}, re-encoding it. Error: {e}")
+
     video = VideoFileClip(in_video_path, audio=False)
     audio = AudioFileClip(in_audio_path)
 
@@ -13,13 +32,40 @@ def inject_audio_in_video(in_audio_path: str, in_video_path: str, out_video_path
     video.write_videofile(out_video_path, codec='libx264', audio_codec='aac', bitrate=video_bitrate)
 
 
-def extract_audio_from_video(video_path: str, audio_output_path: str):
+def mux_audio_in_video(in_audio_path: str, in_video_path: str, out_video_path: str, audio_bitrate: str = '192k'):
     """
-    Extracts audio from video and saves result in WAV
+    Muxes audio into video with ffmpeg copying the video stream without re-encoding.
+    Audio is padded with silence or cut to the video duration.
+    Raises subprocess.CalledProcessError if ffmpeg fails (e.g. codec is not supported by the container)
+    and IOError if the video info can not be parsed.
     """
-    video = VideoFileClip(video_path)
-    audio = video.audio
-    audio.write_audiofile(audio_output_path)
-    video.close()
+    video_duration = ffmpeg_parse_infos(in_video_path)["duration"]
+    command = [
+        get_setting("FFMPEG_BINARY"), "-y", "-v", "error",
+        "-i", in_video_path,
+        "-i", in_audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-c:v", "copy",
+        "-c:a", "aac", "-b:a", audio_bitrate,
+        "-af", f"apad=whole_dur={video_duration}", "-t", str(video_duration),
+        "-movflags", "+faststart",
+        out_video_path,
+    ]
+    subprocess.run(command, check=True, capture_output=True, text=True)
 
 
+def extract_audio_from_video(video_path: str, audio_output_path: str, sample_rate: int = 24000, channels: int = 1):
+    """
+    Extracts audio from video and saves result in WAV.
+    Only the audio stream is demuxed and decoded, it is resampled straight to
+    the given format (mono 24kHz by default, enough for transcription and voice cloning).
+    """
+    command = [
+        get_setting("FFMPEG_BINARY"), "-y", "-v", "error",
+        "-i", video_path,
+        "-map", "0:a:0", "-vn",
+        "-ac", str(channels), "-ar", str(sample_rate),
+        "-c:a", "pcm_s16le",
+        audio_output_path,
+    ]
+    subprocess.run(command, check=True, capture_output=True, text=True)
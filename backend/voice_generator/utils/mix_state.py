@@ -0,0 +1,69 @@
+import json
+import os
+
+import numpy as np
+
+
+class MixState:
+    """
+    Persisted unclipped float32 mix buffer of a task plus placement of every clip mixed into it.
+    The buffer is memory-mapped and changed in place, so the next run touches only the sample
+    ranges of changed clips instead of rebuilding or copying the whole track.
+    The manifest is removed before the buffer is modified and written back after it is flushed,
+    so an interrupted run leaves no state and the next run rebuilds the track.
+    """
+    MANIFEST_FILENAME = "mix_manifest.json"
+    BUFFER_FILENAME = "mix_buffer.npy"
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.manifest_filepath = os.path.join(folder, self.MANIFEST_FILENAME)
+        self.buffer_filepath = os.path.join(folder, self.BUFFER_FILENAME)
+
+    def load(self, sample_rate: int, length: int) -> tuple[np.memmap, dict] | None:
+        """
+        Returns the previous mix buffer opened for in-place changes and clip placements by subtitle id,
+        or None if there is no usable state.
+        """
+        try:
+            with open(self.manifest_filepath, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["sample_rate"] != sample_rate:
+                return None
+            track = np.load(self.buffer_filepath, mmap_mode="r+")
+        except (FileNotFoundError, KeyError, ValueError):
+            return None
+        if track.dtype != np.float32 or track.shape != (length,):
+            return None
+        return track, manifest["clips"]
+
+    def create_buffer(self, length: int) -> np.memmap:
+        """Creates a new zeroed mix buffer, replacing the previous one."""
+        return np.lib.format.open_memmap(self.buffer_filepath, mode="w+", dtype=np.float32, shape=(length,))
+
+    def invalidate(self):
+        """Called before the buffer is modified, the state is usable again only after save."""
+        try:
+            os.remove(self.manifest_filepath)
+        except FileNotFoundError:
+            pass
+
+    def save(self, track: np.memmap, sample_rate: int, clips: dict):
+        track.flush()
+        manifest = {
+            "sample_rate": sample_rate,
+            "clips": clips,
+        }
+        temp_manifest_filepath = self.manifest_filepath + ".tmp"
+        with open(temp_manifest_filepath, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(temp_manifest_filepath, self.manifest_filepath)
+
+    @staticmethod
+    def get_clip_fingerprint(clip_filepath: str) -> list | None:
+        """Cheap identity of a clip file, changes whenever the file is rewritten."""
+        try:
+            stat = os.stat(clip_filepath)
+        except FileNotFoundError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Tuple
+
+# torch is imported on first use, so importing the cache does not slow down worker startup
+if TYPE_CHECKING:
+    import torch
+
+Latents = Tuple["torch.Tensor", "torch.Tensor"]
+
+
+class SpeakerLatentsCache:
+    """
+    LRU cache of XTTS speaker conditioning latents.
+    Latents are keyed by speaker wav content hash and model id, kept in memory
+    and persisted to the given cache folder, so re-runs of the task skip the encoder.
+    """
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, max_items: int, device: str = "cpu"):
+        self.max_items = max_items
+        self.device = device
+        self._latents = OrderedDict()
+
+    def get(self, speaker_wav_filepath: str, model_id: str, cache_folder: str,
+            compute_latents: Callable[[str], Latents]) -> Latents:
+        key = self._make_key(speaker_wav_filepath, model_id)
+
+        if key in self._latents:
+            self._latents.move_to_end(key)
+            return self._latents[key]
+
+        cache_filepath = os.path.join(cache_folder, f"{key}.pt")
+        latents = self._load_latents(cache_filepath)
+        if latents is None:
+            latents = compute_latents(speaker_wav_filepath)
+            self._save_latents(latents, cache_filepath)
+
+        self._put(key, latents)
+        return latents
+
+    def _put(self, key: str, latents: Latents):
+        self._latents[key] = latents
+        self._latents.move_to_end(key)
+        while len(self._latents) > self.max_items:
+            self._latents.popitem(last=False)
+
+    def _load_latents(self, cache_filepath: str) -> Latents | None:
+        if not os.path.exists(cache_filepath):
+            return None
+        import torch
+        try:
+            return torch.load(cache_filepath, map_location=self.device)
+        except Exception:
+            # A broken file is removed, latents are computed again
+            try:
+                os.remove(cache_filepath)
+            except FileNotFoundError:
+                pass
+            return None
+
+    @staticmethod
+    def _save_latents(latents: Latents, cache_filepath: str):
+        import torch
+        cache_folder = os.path.dirname(cache_filepath)
+        os.makedirs(cache_folder, exist_ok=True)
+        # Pool processes may save the same latents at the same time, each one writes its own temp file
+        temp_fd, temp_filepath = tempfile.mkstemp(dir=cache_folder, suffix=".tmp")
+        os.close(temp_fd)
+        try:
+            torch.save(tuple(tensor.cpu() for tensor in latents), temp_filepath)
+            os.replace(temp_filepath, cache_filepath)
+        finally:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+
+    def _make_key(self, speaker_wav_filepath: str, model_id: str) -> str:
+        model_id = model_id.replace("/", "--")
+        return f"{model_id}_{self.get_file_hash(speaker_wav_filepath)}"
+
+    @classmethod
+    def get_file_hash(cls, filepath: str) -> str:
+        file_hash = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            while chunk := f.read(cls.HASH_CHUNK_SIZE):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
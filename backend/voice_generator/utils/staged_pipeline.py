@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List
+
+from logging_conf import setup_logging
+
+
+logger = setup_logging()
+
+_STOP = object()
+
+
+class PipelineStage:
+    """
+    Stage of StagedPipeline: num_workers threads applying func to items of the bounded input queue.
+    Items leave a stage with more than one worker in completion order, not in input order.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], num_workers: int = 1, queue_size: int = 8):
+        self.name = name
+        self.func = func
+        self.num_workers = num_workers
+        self.input_queue = queue.Queue(maxsize=queue_size)
+
+        self.busy_time = 0.0
+        self.processed_items = 0
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+        self._running_workers = 0
+
+    def _update_metrics(self, busy_time: float):
+        with self._lock:
+            self.busy_time += busy_time
+            self.processed_items += 1
+
+    def _sample_queue_depth(self) -> int:
+        depth = self.input_queue.qsize()
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        return depth
+
+
+class StagedPipeline:
+    """
+    Runs items produced by a source iterable through stages connected by bounded queues.
+    The source is iterated in the calling thread (so it may use a non thread-safe model),
+    every stage runs on its own worker threads. Full queues block the previous stage, which
+    bounds memory when a later stage is slower. Queue depth and busy time of every stage
+    are logged every metrics_interval seconds and once at the end.
+    """
+
+    def __init__(self, stages: List[PipelineStage], metrics_interval: float = 30.0):
+        if len(stages) == 0:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.metrics_interval = metrics_interval
+        self.source_busy_time = 0.0
+        self._error = None
+        self._error_lock = threading.Lock()
+
+    def run(self, source: Iterable):
+        threads = []
+        for stage_index, stage in enumerate(self.stages):
+            next_stage = self.stages[stage_index + 1] if stage_index + 1 < len(self.stages) else None
+            stage._running_workers = stage.num_workers
+            for worker_index in range(stage.num_workers):
+                thread = threading.Thread(
+                    target=self._stage_worker,
+                    args=(stage, next_stage),
+                    name=f"pipeline-{stage.name}-{worker_index}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        metrics_stop_event = threading.Event()
+        metrics_thread = threading.Thread(target=self._log_metrics_periodically, args=(metrics_stop_event,), daemon=True)
+        metrics_thread.start()
+
+        pipeline_start_time = time.perf_counter()
+        try:
+            self._feed_source(source)
+        finally:
+            for _ in range(self.stages[0].num_workers):
+                self.stages[0].input_queue.put(_STOP)
+            for thread in threads:
+                thread.join()
+            metrics_stop_event.set()
+            metrics_thread.join()
+
+        self._log_summary(time.perf_counter() - pipeline_start_time)
+        if self._error is not None:
+            raise self._error
+
+    def _feed_source(self, source: Iterable):
+        first_queue = self.stages[0].input_queue
+        source_iterator = iter(source)
+        while self._error is None:
+            produce_start_time = time.perf_counter()
+            try:
+                item = next(source_iterator)
+            except StopIteration:
+                return
+            self.source_busy_time += time.perf_counter() - produce_start_time
+            first_queue.put(item)
+            self.stages[0]._sample_queue_depth()
+
+    def _stage_worker(self, stage: PipelineStage, next_stage: PipelineStage | None):
+        while True:
+            item = stage.input_queue.get()
+            if item is _STOP:
+                break
+            # After an error the rest of the items are drained without processing
+            if self._error is not None:
+                continue
+            process_start_time = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                self._set_error(e, stage)
+                continue
+            stage._update_metrics(time.perf_counter() - process_start_time)
+            if next_stage is not None:
+                next_stage.input_queue.put(result)
+                next_stage._sample_queue_depth()
+
+        with stage._lock:
+            stage._running_workers -= 1
+            is_last_worker = stage._running_workers == 0
+        if is_last_worker and next_stage is not None:
+            for _ in range(next_stage.num_workers):
+                next_stage.input_queue.put(_STOP)
+
+    def _set_error(self, error: Exception, stage: PipelineStage):
+        with self._error_lock:
+            if self._error is None:
+                logger.error(f"Pipeline stage {stage.name} failed: {error}")
+                self._error = error
+
+    def _log_metrics_periodically(self, stop_event: threading.Event):
+        while not stop_event.wait(self.metrics_interval):
+            stages_metrics = ", ".join(
+                f"{stage.name}: queue {stage._sample_queue_depth()}/{stage.input_queue.maxsize}, "
+                f"done {stage.processed_items}, busy {stage.busy_time:.1f}s"
+                for stage in self.stages
+            )
+            logger.info(f"Pipeline source busy {self.source_busy_time:.1f}s; {stages_metrics}")
+
+    def _log_summary(self, total_time: float):
+        stages_summary = ", ".join(
+            f"{stage.name}: {stage.processed_items} items, busy {stage.busy_time:.1f}s "
+            f"({stage.busy_time / max(total_time * stage.num_workers, 1e-9):.0%} of {stage.num_workers} workers), "
+            f"max queue {stage.max_queue_depth}/{stage.input_queue.maxsize}"
+            for stage in self.stages
+        )
+        logger.info(f"Pipeline finished in {total_time:.1f}s, source busy {self.source_busy_time:.1f}s; {stages_summary}")
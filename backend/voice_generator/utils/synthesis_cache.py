@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+
+class SynthesisCache:
+    """
+    Content-addressed disk cache of synthesized and time-stretched subtitle clips shared between tasks.
+    Clips are keyed by everything that affects the result (text, language, speaker reference, model,
+    target duration and the gap it may borrow), so a line is reused after id shifts, re-splits or in re-uploaded tasks.
+    The cache is bounded by size, least recently used clips are evicted first.
+    Clips are hard-linked between the cache and task folders, so a clip is written to disk once.
+    Linked files share their mtime, the LRU timestamp is kept in atime to leave it untouched.
+    """
+    EVICT_TO_RATIO = 0.9
+
+    def __init__(self, cache_folder: str, max_size_bytes: int, sample_rate: int):
+        self.cache_folder = cache_folder
+        self.max_size_bytes = max_size_bytes
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_folder, exist_ok=True)
+        self._size_bytes = sum(size for _, _, size in self._list_clips())
+
+    @staticmethod
+    def make_key(text: str, language: str, speaker_wav_hash: str, model_id: str, target_duration: int,
+                 max_duration: int | None = None) -> str:
+        key_data = json.dumps([text, language, speaker_wav_hash, model_id, target_duration, max_duration], ensure_ascii=False)
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, clip_filepath: str) -> np.ndarray | None:
+        """Links the cached clip to clip_filepath and returns its int16 samples, None on a miss."""
+        cache_filepath = self._get_clip_filepath(key)
+        try:
+            # The linked file stays readable even if the clip is evicted right after
+            _link_or_copy(cache_filepath, clip_filepath)
+            clip, _ = sf.read(clip_filepath, dtype="int16")
+        except (FileNotFoundError, RuntimeError):
+            return None
+        try:
+            os.utime(cache_filepath, ns=(time.time_ns(), os.stat(cache_filepath).st_mtime_ns))
+        except FileNotFoundError:
+            pass
+        return clip
+
+    def put(self, key: str, clip_filepath: str):
+        """Adds the already written clip file to the cache."""
+        cache_filepath = self._get_clip_filepath(key)
+        cache_subfolder = os.path.dirname(cache_filepath)
+        os.makedirs(cache_subfolder, exist_ok=True)
+        replaced_size = os.path.getsize(cache_filepath) if os.path.exists(cache_filepath) else 0
+        # Tasks and worker containers share the cache, every writer links to its own temp file
+        temp_fd, temp_filepath = tempfile.mkstemp(dir=cache_subfolder, suffix=".tmp")
+        os.close(temp_fd)
+        try:
+            _link_or_copy(clip_filepath, temp_filepath)
+            os.replace(temp_filepath, cache_filepath)
+        finally:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+
+        with self._lock:
+            self._size_bytes += os.path.getsize(cache_filepath) - replaced_size
+            if self._size_bytes > self.max_size_bytes:
+                self._evict()
+
+    def _evict(self):
+        clips = sorted(self._list_clips(), key=lambda clip: clip[1])
+        self._size_bytes = sum(size for _, _, size in clips)
+        target_size = self.max_size_bytes * self.EVICT_TO_RATIO
+        for clip_filepath, _, size in clips:
+            if self._size_bytes <= target_size:
+                break
+            try:
+                os.remove(clip_filepath)
+            except FileNotFoundError:
+                pass
+            self._size_bytes -= size
+
+    def _list_clips(self):
+        """Yields (filepath, last use time, size) of every cached clip."""
+        for subfolder in os.scandir(self.cache_folder):
+            if not subfolder.is_dir():
+                continue
+            for entry in os.scandir(subfolder.path):
+                if entry.name.endswith(".wav"):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_atime, stat.st_size
+
+    def _get_clip_filepath(self, key: str) -> str:
+        return os.path.join(self.cache_folder, key[:2], f"{key}.wav")
+
+
+def _link_or_copy(src_filepath: str, dst_filepath: str):
+    """Replaces dst with a hard link to src, or with a copy if they are on different filesystems."""
+    try:
+        os.remove(dst_filepath)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src_filepath, dst_filepath)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(src_filepath, dst_filepath)
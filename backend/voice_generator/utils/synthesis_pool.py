@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+from typing import Iterable, Iterator
+
+from logging_conf import setup_logging
+
+
+logger = setup_logging()
+
+# Model holder of the current pool process, created once by _init_worker
+_voice_generator = None
+
+
+def _init_worker(num_threads: int):
+    global _voice_generator
+    import torch
+    torch.set_num_threads(num_threads)
+    from voice_generator import VoiceGenerator
+    _voice_generator = VoiceGenerator(pool_size=0, write_model_checkpoint=False)
+    logger.info(f"Synthesis process {os.getpid()} ready, torch threads: {num_threads}")
+
+
+def _synthesize_batch(batch_args: tuple):
+    return _voice_generator.synthesize_batch(*batch_args)
+
+
+def _save_model_checkpoint(_):
+    _voice_generator.save_model_checkpoint()
+
+
+def _get_sample_rate(_) -> int:
+    return _voice_generator.sample_rate
+
+
+class SynthesisPool:
+    """
+    Pool of processes each loading the TTS model once at startup.
+    Subtitle batches are sharded across processes and results are gathered in submission order.
+    """
+
+    def __init__(self, pool_size: int, num_threads_per_worker: int = 0):
+        if num_threads_per_worker <= 0:
+            num_threads_per_worker = max(1, (os.cpu_count() or 1) // pool_size)
+        # torch is not fork-safe once its thread pools are started
+        context = multiprocessing.get_context("spawn")
+        self.pool = context.Pool(pool_size, initializer=_init_worker, initargs=(num_threads_per_worker,))
+        self.sample_rate = self.pool.apply(_get_sample_rate, (None,))
+
+    def imap_batches(self, batches_args: Iterable[tuple]) -> Iterator[tuple]:
+        """Yields VoiceGenerator.synthesize_batch results in the order of batches_args."""
+        return self.pool.imap(_synthesize_batch, batches_args)
+
+    def save_model_checkpoint(self):
+        """Lets one of the processes write the model checkpoint, synthesis continues on the others."""
+        self.pool.apply_async(_save_model_checkpoint, (None,))
+
+    def close(self):
+        """Stops the worker processes and frees the model copies they hold."""
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
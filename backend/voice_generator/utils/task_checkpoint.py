@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import soundfile as sf
+
+
+class TaskCheckpoint:
+    """
+    Progress manifest of the voice generation of one task.
+    Every finished clip is recorded with its synthesis key, samples hash and duration, and the
+    manifest is rewritten atomically every save_interval clips. A redelivered task skips clips
+    that are recorded with the same key and whose files are intact.
+    """
+    FILENAME = "checkpoint.json"
+    STATUS_IN_PROGRESS = "in_progress"
+    STATUS_COMPLETED = "completed"
+    CLIP_STATUS_DONE = "done"
+
+    def __init__(self, folder: str, save_interval: int):
+        self.filepath = os.path.join(folder, self.FILENAME)
+        self.save_interval = max(save_interval, 1)
+        self._lock = threading.Lock()
+        self._unsaved_clips_count = 0
+        self._clips = self._load_clips()
+
+    def get_done_clip(self, subtitle_id: int, key: str, clip_filepath: str) -> np.ndarray | None:
+        """Returns int16 samples of the clip if it is recorded with the same key and its file is intact."""
+        entry = self._clips.get(str(subtitle_id))
+        if entry is None or entry["status"] != self.CLIP_STATUS_DONE or entry["key"] != key:
+            return None
+        try:
+            clip, _ = sf.read(clip_filepath, dtype="int16")
+        except (FileNotFoundError, RuntimeError):
+            return None
+        if self._get_clip_hash(clip) != entry["clip_hash"]:
+            return None
+        return clip
+
+    def mark_clip_done(self, subtitle_id: int, key: str, clip: np.ndarray, duration_ms: int):
+        """clip is the int16 samples written to the clip file."""
+        clip_hash = self._get_clip_hash(clip)
+        with self._lock:
+            self._clips[str(subtitle_id)] = {
+                "key": key,
+                "clip_hash": clip_hash,
+                "duration_ms": duration_ms,
+                "status": self.CLIP_STATUS_DONE,
+            }
+            self._unsaved_clips_count += 1
+            if self._unsaved_clips_count >= self.save_interval:
+                self._save(self.STATUS_IN_PROGRESS)
+
+    def save(self, completed: bool = False):
+        with self._lock:
+            self._save(self.STATUS_COMPLETED if completed else self.STATUS_IN_PROGRESS)
+
+    def _save(self, status: str):
+        checkpoint = {
+            "status": status,
+            "clips": self._clips,
+        }
+        temp_filepath = self.filepath + ".tmp"
+        with open(temp_filepath, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_filepath, self.filepath)
+        self._unsaved_clips_count = 0
+
+    def _load_clips(self) -> dict:
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as f:
+                return json.load(f)["clips"]
+        except (FileNotFoundError, KeyError, ValueError):
+            return {}
+
+    @staticmethod
+    def _get_clip_hash(clip: np.ndarray) -> str:
+        return hashlib.sha256(np.ascontiguousarray(clip, dtype=np.int16).tobytes()).hexdigest()
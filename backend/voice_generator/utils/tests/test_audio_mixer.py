@@ -0,0 +1,100 @@
+import os
+import shutil
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import soundfile as sf
+
+from utils.audio_mixer import AudioMixer
+
+
+class TestAudioMixer(unittest.TestCase):
+    def setUp(self):
+        self.temp_folder = "temp_mixer"
+        os.makedirs(self.temp_folder, exist_ok=True)
+
+    def tearDown(self):
+        if os.path.exists(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+    def test_add_clip_at_offset(self):
+        mixer = AudioMixer(duration_ms=1000, sample_rate=1000)
+        mixer.add_clip(np.full(100, 0.25, dtype=np.float32), position_ms=200)
+        mixer.add_clip(np.full(100, 0.25, dtype=np.float32), position_ms=250)
+
+        self.assertEqual(mixer.track[199], 0.0)
+        self.assertAlmostEqual(mixer.track[200], 0.25)
+        self.assertAlmostEqual(mixer.track[260], 0.5)
+        self.assertEqual(mixer.track[350], 0.0)
+
+    def test_clip_outside_track_is_truncated(self):
+        mixer = AudioMixer(duration_ms=100, sample_rate=1000)
+        mixer.add_clip(np.full(50, 0.5, dtype=np.float32), position_ms=80)
+        mixer.add_clip(np.full(50, 0.5, dtype=np.float32), position_ms=200)
+
+        self.assertEqual(len(mixer.track), 100)
+        self.assertAlmostEqual(mixer.track[-1], 0.5)
+
+    def test_int16_buffer_saturates(self):
+        mixer = AudioMixer(duration_ms=10, sample_rate=1000, dtype="int16")
+        mixer.add_clip(np.full(10, 30000, dtype=np.int16), position_ms=0)
+        mixer.add_clip(np.full(10, 0.9, dtype=np.float32), position_ms=0)
+
+        self.assertTrue(np.all(mixer.track == AudioMixer.INT16_MAX))
+
+    def test_export_wav_clips_float_buffer(self):
+        memmap_filepath = os.path.join(self.temp_folder, "mix.raw")
+        output_filepath = os.path.join(self.temp_folder, "mix.wav")
+        mixer = AudioMixer(duration_ms=100, sample_rate=1000, memmap_filepath=memmap_filepath)
+        mixer.add_clip(np.full(100, 0.8, dtype=np.float32), position_ms=0)
+        mixer.add_clip(np.full(100, 0.8, dtype=np.float32), position_ms=0)
+        mixer.export_wav(output_filepath)
+
+        audio, sample_rate = sf.read(output_filepath, dtype="float32")
+        self.assertEqual(sample_rate, 1000)
+        self.assertEqual(len(audio), 100)
+        self.assertAlmostEqual(float(audio.max()), 1.0, places=3)
+
+    def test_unsupported_dtype(self):
+        with self.assertRaises(ValueError):
+            AudioMixer(duration_ms=10, sample_rate=1000, dtype="int8")
+
+    def test_subtract_clip_restores_track(self):
+        mixer = AudioMixer(duration_ms=1000, sample_rate=1000)
+        first_clip = np.linspace(-0.3, 0.3, 300, dtype=np.float32)
+        second_clip = np.full(300, 0.2, dtype=np.float32)
+        mixer.add_clip(first_clip, position_ms=100)
+        mixer.add_clip(second_clip, position_ms=250)
+
+        mixer.subtract_clip(second_clip, position_ms=250)
+
+        np.testing.assert_allclose(mixer.track[100:400], first_clip, atol=1e-6)
+        np.testing.assert_allclose(mixer.track[400:], 0.0, atol=1e-6)
+
+    def test_subtract_clip_from_int16_buffer(self):
+        mixer = AudioMixer(duration_ms=10, sample_rate=1000, dtype="int16")
+        with self.assertRaises(ValueError):
+            mixer.subtract_clip(np.zeros(10, dtype=np.float32), position_ms=0)
+
+    def test_export_wav_in_blocks(self):
+        output_filepath = os.path.join(self.temp_folder, "mix.wav")
+        mixer = AudioMixer(duration_ms=2500, sample_rate=1000, dtype="int16")
+        mixer.add_clip(np.arange(2500, dtype=np.int16), position_ms=0)
+
+        with patch.object(AudioMixer, "EXPORT_BLOCK_SECONDS", 1):
+            mixer.export_wav(output_filepath)
+
+        audio, _ = sf.read(output_filepath, dtype="int16")
+        np.testing.assert_array_equal(audio, mixer.track)
+
+    def test_crossfade_join(self):
+        first_clip = np.ones(100, dtype=np.float32)
+        second_clip = np.full(50, 0.5, dtype=np.float32)
+        joined = AudioMixer.crossfade_join([first_clip, second_clip], crossfade_length=10)
+
+        self.assertEqual(len(joined), 140)
+        np.testing.assert_array_equal(joined[:90], 1.0)
+        np.testing.assert_array_equal(joined[100:], 0.5)
+        self.assertTrue(np.all(np.diff(joined[89:101]) <= 0))
+        self.assertEqual(len(AudioMixer.crossfade_join([], crossfade_length=10)), 0)
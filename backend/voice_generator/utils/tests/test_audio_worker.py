@@ -0,0 +1,98 @@
+import os
+import shutil
+import subprocess
+import unittest
+from unittest.mock import patch
+from moviepy.config import get_setting
+from moviepy.editor import VideoFileClip
+
+from utils.audio_worker import inject_audio_in_video, mux_audio_in_video
+
+
+def generate_sample_video(video_path: str, duration: int, video_codec: str = "libx264"):
+    subprocess.run([
+        get_setting("FFMPEG_BINARY"), "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc=size=320x240:rate=25:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+        "-c:v", video_codec, "-pix_fmt", "yuv420p", "-c:a", "aac",
+        video_path,
+    ], check=True)
+
+
+def get_video_stream_md5(video_path: str) -> str:
+    """MD5 of the encoded video packets, equal only if the stream was copied without re-encoding."""
+    result = subprocess.run([
+        get_setting("FFMPEG_BINARY"), "-v", "error",
+        "-i", video_path,
+        "-map", "0:v:0", "-c", "copy", "-f", "md5", "-",
+    ], check=True, capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def generate_sample_audio(audio_path: str, duration: int):
+    subprocess.run([
+        get_setting("FFMPEG_BINARY"), "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"sine=frequency=880:duration={duration}",
+        audio_path,
+    ], check=True)
+
+
+class TestInjectAudioInVideo(unittest.TestCase):
+    def setUp(self):
+        self.temp_folder = "temp_audio_worker"
+        os.makedirs(self.temp_folder, exist_ok=True)
+        self.test_video_path = os.path.join(self.temp_folder, 'test_video.mp4')
+        self.test_audio_path = os.path.join(self.temp_folder, 'test_audio.wav')
+        self.output_video_path = os.path.join(self.temp_folder, 'output_video.mp4')
+
+        generate_sample_video(self.test_video_path, duration=5)
+        generate_sample_audio(self.test_audio_path, duration=5)
+
+    def tearDown(self):
+        if os.path.exists(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+    def test_inject_audio_in_video(self):
+        inject_audio_in_video(self.test_audio_path, self.test_video_path, self.output_video_path)
+
+        self.assertTrue(os.path.exists(self.output_video_path))
+        output_video = VideoFileClip(self.output_video_path)
+        self.assertIsNotNone(output_video.audio)
+        self.assertAlmostEqual(output_video.duration, 5, delta=0.2)
+        output_video.close()
+
+    def test_mux_pads_short_audio_to_video_duration(self):
+        short_audio_path = os.path.join(self.temp_folder, 'short_audio.wav')
+        generate_sample_audio(short_audio_path, duration=2)
+
+        mux_audio_in_video(short_audio_path, self.test_video_path, self.output_video_path)
+
+        output_video = VideoFileClip(self.output_video_path)
+        self.assertAlmostEqual(output_video.duration, 5, delta=0.2)
+        self.assertAlmostEqual(output_video.audio.duration, 5, delta=0.2)
+        output_video.close()
+
+    def test_fallback_to_reencode_when_codec_can_not_be_copied(self):
+        avi_video_path = os.path.join(self.temp_folder, 'test_video.avi')
+        generate_sample_video(avi_video_path, duration=2, video_codec="wmv2")
+
+        inject_audio_in_video(self.test_audio_path, avi_video_path, self.output_video_path)
+
+        output_video = VideoFileClip(self.output_video_path)
+        self.assertIsNotNone(output_video.audio)
+        output_video.close()
+
+    def test_fallback_to_reencode_when_video_info_can_not_be_read(self):
+        with patch('utils.audio_worker.ffmpeg_parse_infos', side_effect=IOError("broken header")):
+            inject_audio_in_video(self.test_audio_path, self.test_video_path, self.output_video_path)
+
+        output_video = VideoFileClip(self.output_video_path)
+        self.assertIsNotNone(output_video.audio)
+        output_video.close()
+
+    def test_stream_copy_keeps_video_stream_untouched(self):
+        inject_audio_in_video(self.test_audio_path, self.test_video_path, self.output_video_path)
+        self.assertEqual(get_video_stream_md5(self.output_video_path), get_video_stream_md5(self.test_video_path))
+
+        inject_audio_in_video(self.test_audio_path, self.test_video_path, self.output_video_path, copy_video_stream=False)
+        self.assertNotEqual(get_video_stream_md5(self.output_video_path), get_video_stream_md5(self.test_video_path))
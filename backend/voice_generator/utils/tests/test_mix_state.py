@@ -0,0 +1,59 @@
+import os
+import shutil
+import unittest
+
+import numpy as np
+
+from utils.mix_state import MixState
+
+
+class TestMixState(unittest.TestCase):
+    def setUp(self):
+        self.temp_folder = "temp_mix_state"
+        os.makedirs(self.temp_folder, exist_ok=True)
+        self.mix_state = MixState(self.temp_folder)
+
+    def tearDown(self):
+        if os.path.exists(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+    def test_load_without_state(self):
+        self.assertIsNone(self.mix_state.load(sample_rate=24000, length=100))
+
+    def test_save_and_load(self):
+        track = self.mix_state.create_buffer(100)
+        track[:] = np.linspace(-1, 1, 100, dtype=np.float32)
+        clips = {"1": {"start_time": 10, "fingerprint": [100, 123]}}
+        self.mix_state.save(track, 24000, clips)
+
+        loaded_track, loaded_clips = self.mix_state.load(sample_rate=24000, length=100)
+
+        np.testing.assert_array_equal(loaded_track, np.linspace(-1, 1, 100, dtype=np.float32))
+        self.assertEqual(loaded_clips, clips)
+        self.assertIsNone(self.mix_state.load(sample_rate=16000, length=100))
+        self.assertIsNone(self.mix_state.load(sample_rate=24000, length=200))
+
+    def test_loaded_buffer_is_changed_in_place(self):
+        track = self.mix_state.create_buffer(10)
+        self.mix_state.save(track, 24000, {})
+
+        loaded_track, _ = self.mix_state.load(sample_rate=24000, length=10)
+        self.mix_state.invalidate()
+        loaded_track[2:4] += 0.5
+        self.assertIsNone(self.mix_state.load(sample_rate=24000, length=10))
+        self.mix_state.save(loaded_track, 24000, {})
+
+        reloaded_track, _ = self.mix_state.load(sample_rate=24000, length=10)
+        np.testing.assert_array_equal(reloaded_track, [0, 0, 0.5, 0.5, 0, 0, 0, 0, 0, 0])
+
+    def test_clip_fingerprint_changes_on_rewrite(self):
+        clip_filepath = os.path.join(self.temp_folder, "1_adj.wav")
+        self.assertIsNone(MixState.get_clip_fingerprint(clip_filepath))
+
+        with open(clip_filepath, "wb") as f:
+            f.write(b"first")
+        first_fingerprint = MixState.get_clip_fingerprint(clip_filepath)
+        with open(clip_filepath, "wb") as f:
+            f.write(b"second version")
+
+        self.assertNotEqual(first_fingerprint, MixState.get_clip_fingerprint(clip_filepath))
@@ -0,0 +1,101 @@
+import os
+import pickle
+import shutil
+import sys
+import types
+import unittest
+from unittest.mock import patch
+
+from utils.speaker_latents_cache import SpeakerLatentsCache
+
+
+class FakeTensor:
+    def __init__(self, value: str):
+        self.value = value
+
+    def cpu(self):
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, FakeTensor) and self.value == other.value
+
+
+def fake_torch_save(obj, filepath: str):
+    with open(filepath, "wb") as f:
+        pickle.dump(obj, f)
+
+
+def fake_torch_load(filepath: str, map_location: str):
+    with open(filepath, "rb") as f:
+        return pickle.load(f)
+
+
+class TestSpeakerLatentsCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_folder = "temp_speaker_latents_cache"
+        self.cache_folder = os.path.join(self.temp_folder, "latents")
+        os.makedirs(self.temp_folder, exist_ok=True)
+        self.speaker_wav_filepaths = []
+        for i in range(3):
+            speaker_wav_filepath = os.path.join(self.temp_folder, f"speaker_{i}.wav")
+            with open(speaker_wav_filepath, "wb") as f:
+                f.write(f"speaker {i} audio".encode())
+            self.speaker_wav_filepaths.append(speaker_wav_filepath)
+
+        self.computed = []
+        fake_torch = types.SimpleNamespace(save=fake_torch_save, load=fake_torch_load)
+        self.torch_patch = patch.dict(sys.modules, {"torch": fake_torch})
+        self.torch_patch.start()
+
+    def tearDown(self):
+        self.torch_patch.stop()
+        if os.path.exists(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+    def _compute_latents(self, speaker_wav_filepath: str):
+        self.computed.append(speaker_wav_filepath)
+        return FakeTensor(f"gpt {speaker_wav_filepath}"), FakeTensor(f"embedding {speaker_wav_filepath}")
+
+    def _get(self, cache: SpeakerLatentsCache, speaker_index: int, model_id: str = "model/xtts"):
+        return cache.get(self.speaker_wav_filepaths[speaker_index], model_id, self.cache_folder, self._compute_latents)
+
+    def test_encoder_runs_once_per_wav_and_model(self):
+        cache = SpeakerLatentsCache(max_items=4)
+        latents = self._get(cache, 0)
+        self.assertEqual(self._get(cache, 0), latents)
+        self.assertEqual(len(self.computed), 1)
+
+        # Same content in another file shares the latents, another model does not
+        copied_wav_filepath = os.path.join(self.temp_folder, "copy.wav")
+        shutil.copyfile(self.speaker_wav_filepaths[0], copied_wav_filepath)
+        cache.get(copied_wav_filepath, "model/xtts", self.cache_folder, self._compute_latents)
+        self.assertEqual(len(self.computed), 1)
+        self._get(cache, 0, model_id="model/xtts_int8")
+        self.assertEqual(len(self.computed), 2)
+
+    def test_evicted_latents_are_reloaded_from_disk(self):
+        cache = SpeakerLatentsCache(max_items=2)
+        latents = self._get(cache, 0)
+        self._get(cache, 1)
+        self._get(cache, 2)
+        self.assertEqual(len(cache._latents), 2)
+
+        self.assertEqual(self._get(cache, 0), latents)
+        self.assertEqual(len(self.computed), 3)
+
+        # A new cache instance, as after a worker restart, reads the persisted latents as well
+        self.assertEqual(self._get(SpeakerLatentsCache(max_items=2), 1), self._get(cache, 1))
+        self.assertEqual(len(self.computed), 3)
+
+    def test_corrupt_file_is_recomputed(self):
+        self._get(SpeakerLatentsCache(max_items=2), 0)
+        cache_filepaths = [os.path.join(self.cache_folder, filename) for filename in os.listdir(self.cache_folder)]
+        self.assertEqual(len(cache_filepaths), 1)
+        with open(cache_filepaths[0], "wb") as f:
+            f.write(b"partially written")
+
+        latents = self._get(SpeakerLatentsCache(max_items=2), 0)
+
+        self.assertEqual(len(self.computed), 2)
+        self.assertEqual(fake_torch_load(cache_filepaths[0], "cpu"), latents)
+        self.assertEqual(os.listdir(self.cache_folder), [os.path.basename(cache_filepaths[0])])
@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+
+from utils.staged_pipeline import PipelineStage, StagedPipeline
+
+
+class TestStagedPipeline(unittest.TestCase):
+    def test_items_pass_all_stages(self):
+        results = []
+        stages = [
+            PipelineStage("double", lambda x: x * 2, num_workers=3),
+            PipelineStage("collect", results.append),
+        ]
+
+        StagedPipeline(stages).run(range(100))
+
+        self.assertEqual(sorted(results), [x * 2 for x in range(100)])
+        self.assertEqual(stages[0].processed_items, 100)
+        self.assertEqual(stages[1].processed_items, 100)
+
+    def test_empty_source(self):
+        results = []
+        StagedPipeline([PipelineStage("collect", results.append)]).run([])
+        self.assertEqual(results, [])
+
+    def test_stage_error_is_raised(self):
+        def fail_on_five(x):
+            if x == 5:
+                raise ValueError("bad item")
+            return x
+
+        stages = [PipelineStage("check", fail_on_five, num_workers=2), PipelineStage("collect", lambda x: x)]
+        with self.assertRaises(ValueError):
+            StagedPipeline(stages).run(range(50))
+
+    def test_stages_run_concurrently_with_source(self):
+        source_threads = set()
+        stage_threads = set()
+        stage_started = threading.Event()
+        source_resumed = threading.Event()
+        overlaps = {}
+
+        def source():
+            source_threads.add(threading.current_thread().name)
+            yield 0
+            # The stage is still busy with the first item while the source produces the next one
+            overlaps["source"] = stage_started.wait(timeout=5)
+            source_resumed.set()
+            yield 1
+
+        def slow_stage(x):
+            stage_threads.add(threading.current_thread().name)
+            if x == 0:
+                stage_started.set()
+                overlaps["stage"] = source_resumed.wait(timeout=5)
+
+        StagedPipeline([PipelineStage("slow", slow_stage)]).run(source())
+
+        self.assertEqual(source_threads, {threading.current_thread().name})
+        self.assertNotIn(threading.current_thread().name, stage_threads)
+        self.assertEqual(overlaps, {"source": True, "stage": True})
+
+    def test_bounded_queue_limits_depth(self):
+        stage = PipelineStage("slow", lambda x: time.sleep(0.005), queue_size=2)
+        StagedPipeline([stage]).run(range(20))
+        self.assertLessEqual(stage.max_queue_depth, 2)
@@ -0,0 +1,110 @@
+import os
+import shutil
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import soundfile as sf
+
+from utils.synthesis_cache import SynthesisCache
+
+
+class TestSynthesisCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_folder = "temp_synthesis_cache"
+        self.cache = SynthesisCache(os.path.join(self.temp_folder, "cache"), max_size_bytes=10 * 1024 * 1024, sample_rate=1000)
+        self.task_folder = os.path.join(self.temp_folder, "task")
+        os.makedirs(self.task_folder)
+
+    def tearDown(self):
+        if os.path.exists(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+    def _write_clip(self, name: str, clip: np.ndarray) -> str:
+        clip_filepath = os.path.join(self.task_folder, name)
+        sf.write(clip_filepath, clip, 1000, subtype="PCM_16")
+        return clip_filepath
+
+    def test_make_key_depends_on_every_field(self):
+        base_args = ["Hello", "en", "speaker_hash", "model", 1500, 2000]
+        base_key = SynthesisCache.make_key(*base_args)
+        self.assertEqual(base_key, SynthesisCache.make_key(*base_args))
+        for i, changed_value in enumerate(["Hello!", "ru", "other_hash", "other_model", 1501, 2500]):
+            args = list(base_args)
+            args[i] = changed_value
+            self.assertNotEqual(base_key, SynthesisCache.make_key(*args))
+
+    def test_put_and_get(self):
+        clip = np.array([32767, -32768, 30001, 0, -1], dtype=np.int16)
+        key = SynthesisCache.make_key("Hello", "en", "hash", "model", 1000)
+        hit_filepath = os.path.join(self.task_folder, "hit.wav")
+        self.assertIsNone(self.cache.get(key, hit_filepath))
+
+        self.cache.put(key, self._write_clip("clip.wav", clip))
+        cached_clip = self.cache.get(key, hit_filepath)
+
+        self.assertEqual(cached_clip.dtype, np.int16)
+        np.testing.assert_array_equal(cached_clip, clip)
+        np.testing.assert_array_equal(sf.read(hit_filepath, dtype="int16")[0], clip)
+
+    def test_clip_is_linked_not_rewritten(self):
+        key = SynthesisCache.make_key("Hello", "en", "hash", "model", 1000)
+        clip_filepath = self._write_clip("clip.wav", np.zeros(1000, dtype=np.int16))
+        self.cache.put(key, clip_filepath)
+        hit_filepath = os.path.join(self.task_folder, "hit.wav")
+        self.cache.get(key, hit_filepath)
+        self.assertEqual(os.stat(hit_filepath).st_ino, os.stat(clip_filepath).st_ino)
+
+    def test_concurrent_puts_of_the_same_key(self):
+        key = SynthesisCache.make_key("Hello", "en", "hash", "model", 1000)
+        clip_filepaths = [self._write_clip(f"clip_{i}.wav", np.full(1000, i, dtype=np.int16)) for i in range(8)]
+        errors = []
+
+        def put(clip_filepath):
+            try:
+                self.cache.put(key, clip_filepath)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=put, args=(clip_filepath,)) for clip_filepath in clip_filepaths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertIsNotNone(self.cache.get(key, os.path.join(self.task_folder, "hit.wav")))
+
+    def test_hit_survives_concurrent_eviction(self):
+        key = SynthesisCache.make_key("Hello", "en", "hash", "model", 1000)
+        clip = np.arange(1000, dtype=np.int16)
+        self.cache.put(key, self._write_clip("clip.wav", clip))
+        with patch("utils.synthesis_cache.os.utime", side_effect=FileNotFoundError):
+            cached_clip = self.cache.get(key, os.path.join(self.task_folder, "hit.wav"))
+        np.testing.assert_array_equal(cached_clip, clip)
+
+    def test_size_is_restored_from_disk(self):
+        self.cache.put("ab" + "0" * 62, self._write_clip("clip.wav", np.zeros(1000, dtype=np.int16)))
+        reopened_cache = SynthesisCache(self.cache.cache_folder, max_size_bytes=10 * 1024 * 1024, sample_rate=1000)
+        self.assertEqual(reopened_cache._size_bytes, self.cache._size_bytes)
+
+    def test_least_recently_used_clips_are_evicted(self):
+        clip_filepath = self._write_clip("clip.wav", np.zeros(1000, dtype=np.int16))
+        hit_filepath = os.path.join(self.task_folder, "hit.wav")
+        keys = [SynthesisCache.make_key(f"text {i}", "en", "hash", "model", 1000) for i in range(3)]
+        self.cache.put(keys[0], clip_filepath)
+        clip_size = self.cache._size_bytes
+        self.cache.max_size_bytes = clip_size * 2.5
+
+        self.cache.put(keys[1], self._write_clip("clip_1.wav", np.zeros(1000, dtype=np.int16)))
+        time.sleep(0.01)
+        self.cache.get(keys[0], hit_filepath)
+        time.sleep(0.01)
+        self.cache.put(keys[2], self._write_clip("clip_2.wav", np.zeros(1000, dtype=np.int16)))
+
+        self.assertIsNotNone(self.cache.get(keys[0], hit_filepath))
+        self.assertIsNone(self.cache.get(keys[1], hit_filepath))
+        self.assertIsNotNone(self.cache.get(keys[2], hit_filepath))
+        self.assertLessEqual(self.cache._size_bytes, self.cache.max_size_bytes)
@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+from utils.task_checkpoint import TaskCheckpoint
+
+
+class TestTaskCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.temp_folder = "temp_task_checkpoint"
+        os.makedirs(self.temp_folder, exist_ok=True)
+        self.clip = np.arange(-500, 500, dtype=np.int16)
+        self.clip_filepath = os.path.join(self.temp_folder, "1_adj.wav")
+        sf.write(self.clip_filepath, self.clip, 24000, subtype="PCM_16")
+
+    def tearDown(self):
+        if os.path.exists(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+    def _read_checkpoint_file(self) -> dict:
+        with open(os.path.join(self.temp_folder, TaskCheckpoint.FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_saved_every_interval(self):
+        checkpoint = TaskCheckpoint(self.temp_folder, save_interval=2)
+        checkpoint.mark_clip_done(1, "key1", self.clip, duration_ms=1000)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_folder, TaskCheckpoint.FILENAME)))
+
+        checkpoint.mark_clip_done(2, "key2", self.clip, duration_ms=1500)
+        saved_checkpoint = self._read_checkpoint_file()
+        self.assertEqual(saved_checkpoint["status"], TaskCheckpoint.STATUS_IN_PROGRESS)
+        self.assertEqual(saved_checkpoint["clips"]["2"]["duration_ms"], 1500)
+
+        checkpoint.save(completed=True)
+        self.assertEqual(self._read_checkpoint_file()["status"], TaskCheckpoint.STATUS_COMPLETED)
+
+    def test_resume_after_restart(self):
+        checkpoint = TaskCheckpoint(self.temp_folder, save_interval=1)
+        checkpoint.mark_clip_done(1, "key1", self.clip, duration_ms=1000)
+
+        resumed_checkpoint = TaskCheckpoint(self.temp_folder, save_interval=1)
+        np.testing.assert_array_equal(resumed_checkpoint.get_done_clip(1, "key1", self.clip_filepath), self.clip)
+        self.assertIsNone(resumed_checkpoint.get_done_clip(1, "other_key", self.clip_filepath))
+        self.assertIsNone(resumed_checkpoint.get_done_clip(2, "key1", self.clip_filepath))
+
+    def test_changed_or_missing_clip_is_not_done(self):
+        checkpoint = TaskCheckpoint(self.temp_folder, save_interval=1)
+        checkpoint.mark_clip_done(1, "key1", self.clip, duration_ms=1000)
+
+        sf.write(self.clip_filepath, self.clip[:500], 24000, subtype="PCM_16")
+        self.assertIsNone(checkpoint.get_done_clip(1, "key1", self.clip_filepath))
+
+        with open(self.clip_filepath, "wb") as f:
+            f.write(b"partially written")
+        self.assertIsNone(checkpoint.get_done_clip(1, "key1", self.clip_filepath))
+
+        os.remove(self.clip_filepath)
+        self.assertIsNone(checkpoint.get_done_clip(1, "key1", self.clip_filepath))
+
+    def test_corrupted_checkpoint_is_ignored(self):
+        checkpoint = TaskCheckpoint(self.temp_folder, save_interval=1)
+        checkpoint.mark_clip_done(1, "key1", self.clip, duration_ms=1000)
+        with open(os.path.join(self.temp_folder, TaskCheckpoint.FILENAME), "w", encoding="utf-8") as f:
+            f.write("{not json")
+        self.assertIsNone(TaskCheckpoint(self.temp_folder, save_interval=1).get_done_clip(1, "key1", self.clip_filepath))
@@ -0,0 +1,30 @@
+import unittest
+
+from utils.text_splitter import split_text
+
+
+class TestTextSplitter(unittest.TestCase):
+    def test_short_text_is_not_split(self):
+        self.assertEqual(split_text(" Hello there. ", 50), ["Hello there."])
+        self.assertEqual(split_text("", 50), [])
+
+    def test_split_at_sentence_ends(self):
+        text = "First sentence here. Second one is here! And the third?"
+        self.assertEqual(split_text(text, 40), ["First sentence here. Second one is here!", "And the third?"])
+
+    def test_split_at_phrase_boundaries(self):
+        text = "A long sentence without an end, but with commas; and other phrase marks"
+        chunks = split_text(text, 35)
+        self.assertEqual(chunks, ["A long sentence without an end,", "but with commas;", "and other phrase marks"])
+
+    def test_dash_starts_the_right_part(self):
+        text = "A long sentence without an end — and a clause after the dash"
+        chunks = split_text(text, 35)
+        self.assertEqual(chunks, ["A long sentence without an end", "— and a clause after the dash"])
+
+    def test_chunks_fit_max_length_and_keep_words(self):
+        text = "word " * 100 + "x" * 30
+        chunks = split_text(text, 25)
+        self.assertTrue(all(len(chunk) <= 25 for chunk in chunks))
+        self.assertEqual(" ".join(chunks).replace(" ", ""), text.replace(" ", ""))
+
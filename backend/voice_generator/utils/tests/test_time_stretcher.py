@@ -0,0 +1,86 @@
+import unittest
+
+import numpy as np
+
+from utils.time_stretcher import TimeStretcher
+
+
+SAMPLE_RATE = 24000
+
+
+def generate_tone(duration_s: float, frequency: float = 220.0) -> np.ndarray:
+    t = np.arange(int(SAMPLE_RATE * duration_s)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def get_dominant_frequency(wav: np.ndarray) -> float:
+    spectrum = np.abs(np.fft.rfft(wav * np.hanning(len(wav))))
+    return np.argmax(spectrum) * SAMPLE_RATE / len(wav)
+
+
+class TestTimeStretcher(unittest.TestCase):
+    def setUp(self):
+        self.stretcher = TimeStretcher(SAMPLE_RATE, min_ratio=0.5, max_ratio=2.0)
+
+    def test_stretch_length_and_pitch(self):
+        tone = generate_tone(1.0)
+        for ratio in [0.6, 1.5]:
+            stretched = self.stretcher.stretch(tone, ratio)
+            self.assertEqual(len(stretched), round(len(tone) * ratio))
+            self.assertAlmostEqual(get_dominant_frequency(stretched), 220.0, delta=3)
+
+    def test_stretch_keeps_amplitude(self):
+        stretched = self.stretcher.stretch(generate_tone(1.0), 1.3)
+        middle = stretched[SAMPLE_RATE // 4:-SAMPLE_RATE // 4]
+        self.assertAlmostEqual(np.max(np.abs(middle)), 0.5, delta=0.05)
+
+    def test_trim_silence(self):
+        silence = np.zeros(SAMPLE_RATE // 2, dtype=np.float32)
+        wav = np.concatenate([silence, generate_tone(1.0), silence])
+        trimmed = self.stretcher.trim_silence(wav)
+
+        margin = SAMPLE_RATE * TimeStretcher.SILENCE_MARGIN_MS // 1000
+        self.assertLessEqual(abs(len(trimmed) - SAMPLE_RATE - 2 * margin), SAMPLE_RATE // 100)
+        self.assertEqual(len(self.stretcher.trim_silence(silence)), 0)
+
+    def test_fit_ratio_uses_speech_duration(self):
+        silence = np.zeros(SAMPLE_RATE // 2, dtype=np.float32)
+        wav = np.concatenate([silence, generate_tone(1.0), silence])
+        result = self.stretcher.fit(wav, target_duration=1500)
+
+        self.assertEqual(len(result.wav), round(SAMPLE_RATE * 1.5))
+        self.assertEqual(result.borrowed_ms, 0)
+        self.assertFalse(result.out_of_range)
+
+    def test_fit_borrows_gap_for_extreme_compression(self):
+        result = self.stretcher.fit(generate_tone(3.0), target_duration=1000, max_duration=2000)
+        self.assertAlmostEqual(result.ratio, 0.5, delta=0.01)
+        self.assertEqual(result.borrowed_ms, 500)
+        self.assertFalse(result.out_of_range)
+
+        result = self.stretcher.fit(generate_tone(3.0), target_duration=1000, max_duration=1200)
+        self.assertEqual(result.borrowed_ms, 200)
+        self.assertEqual(len(result.wav), round(SAMPLE_RATE * 1.2))
+        self.assertTrue(result.out_of_range)
+
+    def test_fit_clamps_extreme_expansion(self):
+        result = self.stretcher.fit(generate_tone(0.5), target_duration=3000, max_duration=4000)
+        self.assertEqual(result.ratio, 2.0)
+        self.assertEqual(len(result.wav), SAMPLE_RATE)
+        self.assertTrue(result.out_of_range)
+
+    def test_fit_zero_target_duration(self):
+        result = self.stretcher.fit(generate_tone(1.0), target_duration=0, max_duration=0)
+        self.assertEqual(len(result.wav), 0)
+        self.assertTrue(result.out_of_range)
+
+        result = self.stretcher.fit(generate_tone(1.0), target_duration=0, max_duration=800)
+        self.assertEqual(result.borrowed_ms, 500)
+        self.assertEqual(len(result.wav), SAMPLE_RATE // 2)
+
+    def test_stretch_zero_ratio(self):
+        self.assertEqual(len(self.stretcher.stretch(generate_tone(1.0), 0)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
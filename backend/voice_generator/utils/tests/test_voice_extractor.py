@@ -0,0 +1,114 @@
+import os
+import shutil
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+from shared_utils.sub_parser import Subtitle
+from utils.voice_extractor import extract_speaker_voices_from_audio
+
+
+SAMPLE_RATE = 8000
+
+
+def generate_speech_like(duration_ms: int, rng: np.random.Generator) -> np.ndarray:
+    """Tone bursts separated by pauses: high level range inside the segment."""
+    t = np.arange(duration_ms * SAMPLE_RATE // 1000) / SAMPLE_RATE
+    bursts = (t * 1000 % 300) < 200
+    return 0.3 * np.sin(2 * np.pi * 300 * t) * bursts + rng.normal(0, 1e-4, len(t))
+
+
+def generate_music_like(duration_ms: int, rng: np.random.Generator) -> np.ndarray:
+    """Constant noise: low level range inside the segment."""
+    return rng.normal(0, 0.1, duration_ms * SAMPLE_RATE // 1000)
+
+
+class TestVoiceExtractor(unittest.TestCase):
+    def setUp(self):
+        self.temp_folder = "temp_voice_extractor"
+        self.out_folder = os.path.join(self.temp_folder, "speakers")
+        os.makedirs(self.temp_folder, exist_ok=True)
+
+        rng = np.random.default_rng(0)
+        mono_audio = np.concatenate([
+            generate_music_like(5000, rng),
+            generate_speech_like(15000, rng),
+            np.zeros(5000 * SAMPLE_RATE // 1000),
+        ])
+        stereo_audio = np.stack([mono_audio, mono_audio], axis=1)
+        self.audio = (stereo_audio * 32767).astype(np.int16)
+        self.audio_filepath = os.path.join(self.temp_folder, "audio.wav")
+        sf.write(self.audio_filepath, self.audio, SAMPLE_RATE, subtype="PCM_16")
+
+    def tearDown(self):
+        if os.path.exists(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+    def _get_samples(self, start_ms: int, end_ms: int) -> np.ndarray:
+        return self.audio[start_ms * SAMPLE_RATE // 1000:end_ms * SAMPLE_RATE // 1000]
+
+    def test_reference_is_built_from_best_segments(self):
+        subtitles = [
+            Subtitle(1, 0, 4500, "music", speaker="A"),
+            Subtitle(2, 5000, 9000, "clean", speaker="A"),
+            Subtitle(3, 10000, 14000, "clean", speaker="A"),
+            Subtitle(4, 15000, 19000, "overlapped", speaker="A"),
+            Subtitle(5, 16000, 19500, "other speaker", speaker="B"),
+            Subtitle(6, 19500, 20000, "no speaker", speaker=None),
+        ]
+        speaker_audio_paths = extract_speaker_voices_from_audio(self.audio_filepath, subtitles, self.out_folder)
+        self.assertEqual(set(speaker_audio_paths), {"A", "B"})
+
+        speaker_audio, sample_rate = sf.read(speaker_audio_paths["A"], dtype="int16")
+        self.assertEqual(sample_rate, SAMPLE_RATE)
+        gap = np.zeros((SAMPLE_RATE // 5, 2), dtype=np.int16)
+        # Two clean segments give 8s, the overlapped one still scores above music and tops up the 10s target
+        expected_audio = np.concatenate([
+            self._get_samples(5000, 9000), gap,
+            self._get_samples(10000, 14000), gap,
+            self._get_samples(15000, 19000),
+        ])
+        np.testing.assert_array_equal(speaker_audio, expected_audio)
+
+    def test_silent_speaker_falls_back_to_longest_subtitle(self):
+        subtitles = [
+            Subtitle(1, 20000, 21000, "a", speaker="A"),
+            Subtitle(2, 21000, 23000, "b", speaker="A"),
+        ]
+        speaker_audio_paths = extract_speaker_voices_from_audio(self.audio_filepath, subtitles, self.out_folder)
+
+        speaker_audio, _ = sf.read(speaker_audio_paths["A"], dtype="int16")
+        np.testing.assert_array_equal(speaker_audio, self._get_samples(21000, 23000))
+
+    def test_speaker_with_only_zero_length_subtitles_gets_reference(self):
+        subtitles = [
+            Subtitle(1, 0, 2000, "a", speaker="A"),
+            Subtitle(2, 2000, 2000, "b", speaker="B"),
+        ]
+        speaker_audio_paths = extract_speaker_voices_from_audio(self.audio_filepath, subtitles, self.out_folder)
+        self.assertEqual(set(speaker_audio_paths), {"A", "B"})
+
+        speaker_audio, _ = sf.read(speaker_audio_paths["B"], dtype="int16")
+        np.testing.assert_array_equal(speaker_audio, self._get_samples(2000, 3000))
+
+    def test_subtitle_beyond_audio_end_is_cut(self):
+        subtitles = [Subtitle(1, 24000, 26000, "a", speaker="A")]
+        speaker_audio_paths = extract_speaker_voices_from_audio(self.audio_filepath, subtitles, self.out_folder)
+
+        speaker_audio, _ = sf.read(speaker_audio_paths["A"], dtype="int16")
+        np.testing.assert_array_equal(speaker_audio, self.audio[24000 * SAMPLE_RATE // 1000:])
+
+    def test_references_are_cached_until_timing_changes(self):
+        subtitles = [Subtitle(1, 5000, 9000, "a", speaker="A")]
+        speaker_audio_paths = extract_speaker_voices_from_audio(self.audio_filepath, subtitles, self.out_folder)
+        reference_mtime = os.stat(speaker_audio_paths["A"]).st_mtime_ns
+
+        subtitles[0].text = "edited text"
+        self.assertEqual(speaker_audio_paths, extract_speaker_voices_from_audio(self.audio_filepath, subtitles, self.out_folder))
+        self.assertEqual(reference_mtime, os.stat(speaker_audio_paths["A"]).st_mtime_ns)
+
+        subtitles = [Subtitle(1, 10000, 12000, "a", speaker="A")]
+        speaker_audio_paths = extract_speaker_voices_from_audio(self.audio_filepath, subtitles, self.out_folder)
+        speaker_audio, _ = sf.read(speaker_audio_paths["A"], dtype="int16")
+        np.testing.assert_array_equal(speaker_audio, self._get_samples(10000, 12000))
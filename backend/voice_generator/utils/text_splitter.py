@@ -0,0 +1,49 @@
+import re
+from typing import List
+
+
+# Split points from the strongest to the weakest. Punctuation stays with the left part,
+# a dash opens the clause after it, so it starts the right part
+SPLIT_PATTERNS = [
+    re.compile(r"(?<=[.!?…])\s+"),
+    re.compile(r"(?<=[,;:])\s+|\s+(?=[—–-]\s)"),
+    re.compile(r"\s+"),
+]
+
+
+def split_text(text: str, max_length: int) -> List[str]:
+    """
+    Splits text into chunks of at most max_length characters, preferring sentence ends,
+    then phrase boundaries, then spaces. Words longer than max_length are cut.
+    """
+    text = text.strip()
+    if len(text) <= max_length:
+        return [text] if text else []
+    return _split_with_pattern(text, max_length, 0)
+
+
+def _split_with_pattern(text: str, max_length: int, pattern_index: int) -> List[str]:
+    if len(text) <= max_length:
+        return [text]
+    if pattern_index == len(SPLIT_PATTERNS):
+        return [text[i:i + max_length] for i in range(0, len(text), max_length)]
+
+    parts = [part for part in SPLIT_PATTERNS[pattern_index].split(text) if part]
+    chunks = []
+    current_chunk = ""
+    for part in parts:
+        if len(part) > max_length:
+            if current_chunk:
+                chunks.append(current_chunk)
+                current_chunk = ""
+            chunks.extend(_split_with_pattern(part, max_length, pattern_index + 1))
+        elif not current_chunk:
+            current_chunk = part
+        elif len(current_chunk) + 1 + len(part) <= max_length:
+            current_chunk += " " + part
+        else:
+            chunks.append(current_chunk)
+            current_chunk = part
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
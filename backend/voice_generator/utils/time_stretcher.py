@@ -0,0 +1,148 @@
+import math
+from typing import List, NamedTuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class StretchResult(NamedTuple):
+    wav: np.ndarray
+    ratio: float
+    borrowed_ms: int
+    # True if the ratio was out of the allowed range and could not be fixed with the gap slack
+    out_of_range: bool
+
+
+class TimeStretcher:
+    """
+    Pitch-preserving time stretch of mono float clips with WSOLA (waveform similarity overlap-add).
+    Every output frame is taken from the input position near the nominal one that best continues
+    the previous frame; the similarity search is a single matrix-vector product per frame.
+    """
+    FRAME_MS = 30
+    SEARCH_MS = 10
+    SEARCH_DECIMATION = 4
+    SILENCE_FRAME_MS = 10
+    SILENCE_MARGIN_MS = 30
+
+    def __init__(self, sample_rate: int, min_ratio: float = 0.5, max_ratio: float = 2.0, silence_threshold_db: float = -45):
+        self.sample_rate = sample_rate
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.silence_threshold = 10 ** (silence_threshold_db / 20)
+
+        self.frame_length = int(sample_rate * self.FRAME_MS / 1000) // 2 * 2
+        self.synthesis_hop = self.frame_length // 2
+        self.search_length = int(sample_rate * self.SEARCH_MS / 1000)
+        # Periodic Hann window sums to 1 with 50% overlap
+        self.window = np.hanning(self.frame_length + 1)[:self.frame_length].astype(np.float32)
+
+    def fit(self, wav: np.ndarray, target_duration: int, max_duration: int | None = None) -> StretchResult:
+        """
+        Trims silence around speech and stretches it to target_duration ms.
+        If speech has to be compressed more than min_ratio allows, the clip borrows time
+        up to max_duration ms (the gap before the next subtitle). Clips that would be stretched
+        more than max_ratio are stretched by max_ratio and stay shorter than the target.
+        """
+        speech = self.trim_silence(wav)
+        speech_duration = len(speech) * 1000 / self.sample_rate
+        if speech_duration == 0:
+            return StretchResult(np.zeros(0, dtype=np.float32), 1.0, 0, False)
+
+        duration = target_duration
+        ratio = duration / speech_duration
+        if ratio < self.min_ratio and max_duration is not None and max_duration > target_duration:
+            duration = min(math.ceil(speech_duration * self.min_ratio), max_duration)
+            ratio = duration / speech_duration
+        if duration <= 0:
+            # Zero-length subtitle without a gap to borrow from, there is no room for the clip
+            return StretchResult(np.zeros(0, dtype=np.float32), 0.0, 0, True)
+
+        out_of_range = ratio < self.min_ratio
+        if ratio > self.max_ratio:
+            ratio = self.max_ratio
+            out_of_range = True
+
+        return StretchResult(self.stretch(speech, ratio), ratio, max(duration - target_duration, 0), out_of_range)
+
+    def fit_batch(self, wavs: List[np.ndarray], target_durations: List[int], max_durations: List[int]) -> List[StretchResult]:
+        return [
+            self.fit(wav, target_duration, max_duration)
+            for wav, target_duration, max_duration in zip(wavs, target_durations, max_durations)
+        ]
+
+    def trim_silence(self, wav: np.ndarray) -> np.ndarray:
+        frame_length = int(self.sample_rate * self.SILENCE_FRAME_MS / 1000)
+        frames_count = len(wav) // frame_length
+        if frames_count == 0:
+            return wav
+        frames = wav[:frames_count * frame_length].reshape(frames_count, frame_length)
+        frames_rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+        loud_frames = np.flatnonzero(frames_rms > self.silence_threshold)
+        if len(loud_frames) == 0:
+            return wav[:0]
+        margin = int(self.sample_rate * self.SILENCE_MARGIN_MS / 1000)
+        start = max(loud_frames[0] * frame_length - margin, 0)
+        end = min((loud_frames[-1] + 1) * frame_length + margin, len(wav))
+        return wav[start:end]
+
+    def stretch(self, wav: np.ndarray, ratio: float) -> np.ndarray:
+        """Returns wav stretched to round(len(wav) * ratio) samples, ratio > 1 makes it longer."""
+        if ratio <= 0:
+            return np.zeros(0, dtype=np.float32)
+        out_length = round(len(wav) * ratio)
+        if abs(ratio - 1.0) < 1e-3 or len(wav) < self.frame_length:
+            return self._fit_length(wav.astype(np.float32), out_length)
+
+        frame_length = self.frame_length
+        synthesis_hop = self.synthesis_hop
+        analysis_hop = synthesis_hop / ratio
+        search_length = self.search_length
+
+        frames_count = out_length // synthesis_hop + 1
+        padding = frame_length + search_length
+        padded_wav = np.zeros(len(wav) + 2 * padding + frame_length + synthesis_hop, dtype=np.float32)
+        padded_wav[padding:padding + len(wav)] = wav
+        max_position = len(padded_wav) - frame_length - search_length * 2 - 1
+
+        output = np.zeros(frames_count * synthesis_hop + frame_length, dtype=np.float32)
+        previous_position = padding
+        for frame_index in range(frames_count):
+            nominal_position = min(padding + int(frame_index * analysis_hop), max_position)
+            if frame_index == 0:
+                position = nominal_position
+            else:
+                position = self._find_best_position(padded_wav, previous_position + synthesis_hop, nominal_position)
+            output_position = frame_index * synthesis_hop
+            output[output_position:output_position + frame_length] += padded_wav[position:position + frame_length] * self.window
+            previous_position = position
+
+        # The first half-frame has only one windowed frame under it
+        return self._fit_length(output[synthesis_hop:], out_length)
+
+    def _find_best_position(self, padded_wav: np.ndarray, natural_position: int, nominal_position: int) -> int:
+        step = self.SEARCH_DECIMATION
+        natural_continuation = padded_wav[natural_position:natural_position + self.frame_length:step]
+        search_start = nominal_position - self.search_length
+        search_region = padded_wav[search_start:nominal_position + self.search_length + self.frame_length]
+        candidates = sliding_window_view(search_region, self.frame_length)[:, ::step]
+        similarity = candidates @ natural_continuation
+        return search_start + int(np.argmax(similarity))
+
+    @staticmethod
+    def _fit_length(wav: np.ndarray, length: int) -> np.ndarray:
+        if len(wav) >= length:
+            return wav[:length]
+        return np.pad(wav, (0, length - len(wav)))
+
+    @staticmethod
+    def get_ratio_stats(results: List[StretchResult]) -> str:
+        if len(results) == 0:
+            return "no clips stretched"
+        ratios = np.array([result.ratio for result in results])
+        borrowed_count = sum(1 for result in results if result.borrowed_ms > 0)
+        borrowed_ms = sum(result.borrowed_ms for result in results)
+        out_of_range_count = sum(1 for result in results if result.out_of_range)
+        return (f"{len(results)} clips, ratio min {ratios.min():.2f} / median {np.median(ratios):.2f} / max {ratios.max():.2f}, "
+                f"{borrowed_count} clips borrowed {borrowed_ms}ms from gaps, {out_of_range_count} clips out of range")
@@ -1,53 +1,197 @@
+import hashlib
+import json
 import os
 from typing import List
-from pydub import AudioSegment
+import numpy as np
+import soundfile as sf
 
 from shared_utils.sub_parser import Subtitle
 
 
+FRAME_MS = 50
+# Total reference length: segments are added until the target is reached, the last one is cut at the max
+REFERENCE_TARGET_MS = 10000
+REFERENCE_MAX_MS = 15000
+# Shorter segments are used only if a speaker has nothing longer
+SEGMENT_MIN_DURATION_MS = 1000
+SEGMENTS_GAP_MS = 200
+# Segments with a quieter speech level are not used as reference
+MIN_SPEECH_LEVEL_DB = -45
+REFERENCES_MANIFEST_FILENAME = "references.json"
+
+
 def extract_speaker_voices_from_audio(audio_filepath: str, subtitles: List[Subtitle], out_folder_name = "speakers"):
+    """
+    Builds a reference wav for every speaker from the best few of their subtitles.
+    Segments are scored by estimated SNR and overlap with other subtitles, references are reused
+    while the audio and subtitles timing do not change.
+    """
     os.makedirs(out_folder_name, exist_ok=True)
 
-    max_duration_subtitles = _find_subtitle_for_each_speaker(subtitles)
+    references_fingerprint = _get_references_fingerprint(audio_filepath, subtitles)
+    speaker_audio_paths = _load_cached_references(out_folder_name, references_fingerprint)
+    if speaker_audio_paths is not None:
+        return speaker_audio_paths
 
-    audio = AudioSegment.from_wav(audio_filepath)
+    speakers_subtitles = _group_subtitles_by_speaker(subtitles)
 
-    # Create audio for each speakers
+    # Only frame energies and the selected ranges are read into memory, so memory does not depend on the audio length
     speaker_audio_paths = {}
-    for speaker, subtitle in max_duration_subtitles.items():
-        speaker_audio = _create_audio_for_speaker(audio, subtitle)
+    with sf.SoundFile(audio_filepath) as audio:
+        frames_energy_db = _get_frames_energy_db(audio)
+        frames_subtitles_count = _get_frames_subtitles_count(subtitles, len(frames_energy_db))
 
-        output_file_path = os.path.join(out_folder_name, f"{speaker}.wav")
-        speaker_audio.export(output_file_path, format="wav")
+        for speaker, speaker_subtitles in speakers_subtitles.items():
+            scores = _score_segments(speaker_subtitles, frames_energy_db, frames_subtitles_count)
+            segments = _select_reference_segments(speaker_subtitles, scores)
+            speaker_audio = _create_audio_for_speaker(audio, segments)
 
-        speaker_audio_paths[speaker] = output_file_path
+            output_file_path = os.path.join(out_folder_name, f"{speaker}.wav")
+            sf.write(output_file_path, speaker_audio, audio.samplerate, subtype=audio.subtype)
 
-    return speaker_audio_paths
+            speaker_audio_paths[speaker] = output_file_path
 
+    _save_references_manifest(out_folder_name, references_fingerprint, speaker_audio_paths)
+    return speaker_audio_paths
 
-def _find_subtitle_for_each_speaker(subtitles: List[Subtitle]) -> dict:
-    max_duration_subtitles = {}
 
+def _group_subtitles_by_speaker(subtitles: List[Subtitle]) -> dict:
+    speakers_subtitles = {}
     for subtitle in subtitles:
+        # Zero-length subtitles are kept, a speaker who has only them still needs a reference
         if subtitle.speaker is None:
             continue
-        
-        if subtitle.speaker not in max_duration_subtitles:
-            max_duration_subtitles[subtitle.speaker] = subtitle
-        elif subtitle.duration > max_duration_subtitles[subtitle.speaker].duration:
-            max_duration_subtitles[subtitle.speaker] = subtitle
-                
-    return max_duration_subtitles
-
-
-def _create_audio_for_speaker(src_audio: AudioSegment, speaker_subtitle: Subtitle) -> AudioSegment:
-    SUBTITLE_MAX_DURATION_MS = 60000
-    
-    start_time = speaker_subtitle.start_time
-    end_time = speaker_subtitle.end_time
-    
-    if speaker_subtitle.duration > SUBTITLE_MAX_DURATION_MS:
-        end_time = start_time + SUBTITLE_MAX_DURATION_MS
-
-    trimmed_audio = src_audio[start_time:end_time]
-    return trimmed_audio
+        speakers_subtitles.setdefault(subtitle.speaker, []).append(subtitle)
+    return speakers_subtitles
+
+
+def _get_frames_energy_db(audio: sf.SoundFile) -> np.ndarray:
+    """Energy in dBFS of every FRAME_MS frame of the mono downmix, computed block by block."""
+    frame_length = max(audio.samplerate * FRAME_MS // 1000, 1)
+    frames_energy = []
+    audio.seek(0)
+    for block in audio.blocks(blocksize=frame_length * 1000, dtype="float32", always_2d=True):
+        mono_block = block.mean(axis=1)
+        frames_count = -(-len(mono_block) // frame_length)
+        mono_block = np.pad(mono_block, (0, frames_count * frame_length - len(mono_block)))
+        frames_energy.append(np.mean(np.square(mono_block.reshape(frames_count, frame_length)), axis=1))
+    if len(frames_energy) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return 10 * np.log10(np.concatenate(frames_energy) + 1e-10)
+
+
+def _get_frames_subtitles_count(subtitles: List[Subtitle], frames_count: int) -> np.ndarray:
+    """Number of subtitles covering every frame."""
+    starts = np.array([subtitle.start_time // FRAME_MS for subtitle in subtitles], dtype=np.int64)
+    ends = np.array([-(-subtitle.end_time // FRAME_MS) for subtitle in subtitles], dtype=np.int64)
+    changes = np.zeros(frames_count + 1, dtype=np.int64)
+    np.add.at(changes, np.clip(starts, 0, frames_count), 1)
+    np.add.at(changes, np.clip(ends, 0, frames_count), -1)
+    return np.cumsum(changes)[:frames_count]
+
+
+def _score_segments(subtitles: List[Subtitle], frames_energy_db: np.ndarray, frames_subtitles_count: np.ndarray) -> np.ndarray:
+    """
+    Score of every subtitle segment: SNR estimate (speech level over the noise floor inside the segment),
+    reduced by the share of the segment overlapped by other subtitles. Music or constant background
+    noise under the speech lowers the SNR estimate. Unusable segments get -inf.
+    """
+    scores = np.full(len(subtitles), -np.inf)
+    for i, subtitle in enumerate(subtitles):
+        if subtitle.duration <= 0:
+            continue
+        start_frame = subtitle.start_time // FRAME_MS
+        end_frame = -(-subtitle.end_time // FRAME_MS)
+        segment_energy_db = frames_energy_db[start_frame:end_frame]
+        if len(segment_energy_db) == 0:
+            continue
+        noise_floor_db, speech_level_db = np.percentile(segment_energy_db, [10, 90])
+        if speech_level_db < MIN_SPEECH_LEVEL_DB:
+            continue
+        overlap = np.mean(frames_subtitles_count[start_frame:end_frame] > 1)
+        scores[i] = (speech_level_db - noise_floor_db) * (1 - overlap)
+    return scores
+
+
+def _select_reference_segments(subtitles: List[Subtitle], scores: np.ndarray) -> List[tuple]:
+    """Picks (start_ms, end_ms) ranges of the best segments in score order until the reference is long enough."""
+    is_long_enough = np.array([subtitle.duration >= SEGMENT_MIN_DURATION_MS for subtitle in subtitles])
+    if is_long_enough.any():
+        scores = np.where(is_long_enough, scores, -np.inf)
+    if np.isneginf(scores).all():
+        # Nothing passed the quality checks, fall back to the longest subtitle. If all subtitles
+        # have zero length, the audio right after the first one is the nearest to the speaker
+        longest_subtitle = max(subtitles, key=lambda subtitle: subtitle.duration)
+        duration = min(longest_subtitle.duration, REFERENCE_MAX_MS)
+        if duration <= 0:
+            duration = SEGMENT_MIN_DURATION_MS
+        return [(longest_subtitle.start_time, longest_subtitle.start_time + duration)]
+
+    segments = []
+    total_duration = 0
+    for i in np.argsort(-scores, kind="stable"):
+        if np.isneginf(scores[i]) or total_duration >= REFERENCE_TARGET_MS:
+            break
+        duration = min(subtitles[i].duration, REFERENCE_MAX_MS - total_duration)
+        segments.append((subtitles[i].start_time, subtitles[i].start_time + duration))
+        total_duration += duration
+    return sorted(segments)
+
+
+def _create_audio_for_speaker(src_audio: sf.SoundFile, segments: List[tuple]) -> np.ndarray:
+    # 16-bit samples are copied as is, other formats go through float
+    dtype = "int16" if src_audio.subtype == "PCM_16" else "float32"
+    gap = np.zeros((src_audio.samplerate * SEGMENTS_GAP_MS // 1000, src_audio.channels), dtype=dtype)
+
+    parts = []
+    for start_time, end_time in segments:
+        start_frame = min(start_time * src_audio.samplerate // 1000, src_audio.frames)
+        end_frame = min(end_time * src_audio.samplerate // 1000, src_audio.frames)
+        src_audio.seek(start_frame)
+        if parts:
+            parts.append(gap)
+        parts.append(src_audio.read(end_frame - start_frame, dtype=dtype, always_2d=True))
+    if len(parts) == 0:
+        return np.zeros((0, src_audio.channels), dtype=dtype)
+    return np.concatenate(parts)
+
+
+def _get_references_fingerprint(audio_filepath: str, subtitles: List[Subtitle]) -> str:
+    audio_stat = os.stat(audio_filepath)
+    fingerprint_data = json.dumps([
+        audio_stat.st_size,
+        audio_stat.st_mtime_ns,
+        [[subtitle.start_time, subtitle.end_time, subtitle.speaker] for subtitle in subtitles],
+    ])
+    return hashlib.sha256(fingerprint_data.encode("utf-8")).hexdigest()
+
+
+def _load_cached_references(out_folder_name: str, references_fingerprint: str) -> dict | None:
+    manifest_filepath = os.path.join(out_folder_name, REFERENCES_MANIFEST_FILENAME)
+    try:
+        with open(manifest_filepath, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get("fingerprint") != references_fingerprint:
+        return None
+
+    speaker_audio_paths = {
+        speaker: os.path.join(out_folder_name, filename)
+        for speaker, filename in manifest["speakers"].items()
+    }
+    if not all(os.path.exists(path) for path in speaker_audio_paths.values()):
+        return None
+    return speaker_audio_paths
+
+
+def _save_references_manifest(out_folder_name: str, references_fingerprint: str, speaker_audio_paths: dict):
+    manifest = {
+        "fingerprint": references_fingerprint,
+        "speakers": {speaker: os.path.basename(path) for speaker, path in speaker_audio_paths.items()},
+    }
+    manifest_filepath = os.path.join(out_folder_name, REFERENCES_MANIFEST_FILENAME)
+    temp_filepath = manifest_filepath + ".tmp"
+    with open(temp_filepath, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(temp_filepath, manifest_filepath)
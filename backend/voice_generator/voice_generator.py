@@ -1,12 +1,23 @@
 import os
+import tempfile
+import threading
 import time
-from typing import List
-import torch
-from audiostretchy.stretch import stretch_audio
-from pydub import AudioSegment
-from TTS.api import TTS
+from importlib import metadata
+from typing import Callable, Iterator, List, Tuple
+import numpy as np
+import soundfile as sf
+from config_voice_gen import ConfigVoiceGen
 from logging_conf import setup_logging
 from utils import audio_worker
+from utils.audio_mixer import AudioMixer
+from utils.mix_state import MixState
+from utils.staged_pipeline import PipelineStage, StagedPipeline
+from utils.synthesis_cache import SynthesisCache
+from utils.synthesis_pool import SynthesisPool
+from utils.task_checkpoint import TaskCheckpoint
+from utils.text_splitter import split_text
+from utils.speaker_latents_cache import SpeakerLatentsCache
+from utils.time_stretcher import StretchResult, TimeStretcher
 from utils.voice_extractor import extract_speaker_voices_from_audio
 from shared_utils.sub_parser import Subtitle, parse_json_to_subtitles, export_subtitles_to_json_file
 
@@ -14,16 +25,196 @@ logger = setup_logging()
 
 class VoiceGenerator:
     PATH_TO_MODEL = "tts_models/multilingual/multi-dataset/xtts_v2"
+    INFERENCE_MODES = ("fp32", "int8")
     BASE_TEMP_FOLDER_NAME = os.path.join("uploads", "temp")
 
-    def __init__(self):
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"Initialazing voice generator on device: {device}")
-        self.tts = TTS(model_name=self.PATH_TO_MODEL,progress_bar=False).to(device)
-
+    def __init__(self, batch_size: int = ConfigVoiceGen.SYNTHESIS_BATCH_SIZE, pool_size: int = ConfigVoiceGen.SYNTHESIS_POOL_SIZE,
+                 lazy_load: bool = False, inference_mode: str = ConfigVoiceGen.INFERENCE_MODE,
+                 write_model_checkpoint: bool = True):
+        if inference_mode not in self.INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode {inference_mode}, expected one of {self.INFERENCE_MODES}")
+        self.batch_size = batch_size
+        self.pool_size = pool_size
+        self.inference_mode = inference_mode
+        # Synthesis pool processes only read the checkpoint, the process owning the pool writes it once
+        self.write_model_checkpoint = write_model_checkpoint
+        # Caches of latents and clips are kept apart for every inference mode
+        self.model_id = self._get_model_id(inference_mode)
         os.makedirs(self.BASE_TEMP_FOLDER_NAME, exist_ok=True)
+
+        self._model_ready = threading.Event()
+        self._model_load_error = None
+        if lazy_load:
+            threading.Thread(target=self._load_model_in_background, daemon=True).start()
+        else:
+            self._load_model()
+
+    def wait_until_ready(self):
+        """Blocks until the model is loaded. Raises if loading failed."""
+        self._model_ready.wait()
+        if self._model_load_error is not None:
+            raise RuntimeError("Voice generation model failed to load") from self._model_load_error
+
+    def close(self):
+        """Stops the synthesis pool processes, a loading model is waited for so its pool is not left behind."""
+        self._model_ready.wait()
+        if self.synthesis_pool is not None:
+            self.synthesis_pool.close()
+            self.synthesis_pool = None
+
+    def _load_model_in_background(self):
+        try:
+            self._load_model()
+        except Exception as e:
+            logger.exception(e)
+            self._model_load_error = e
+            self._model_ready.set()
+
+    def _load_model(self):
+        load_start_time = time.perf_counter()
+        # In pool mode every worker process holds its own model, the main process only mixes results
+        self.synthesis_pool = None
+        if self.pool_size > 1:
+            logger.info(f"Initialazing voice generator with synthesis pool of {self.pool_size} processes")
+            self.synthesis_pool = SynthesisPool(self.pool_size, ConfigVoiceGen.SYNTHESIS_POOL_THREADS_PER_WORKER)
+            self.sample_rate = self.synthesis_pool.sample_rate
+        else:
+            import_start_time = time.perf_counter()
+            import torch
+            logger.info(f"torch imported in {time.perf_counter() - import_start_time:.2f}s")
+
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            if device != "cpu" and self.inference_mode == "int8":
+                logger.warning("int8 inference is CPU only, using fp32 model")
+                self.inference_mode = "fp32"
+                self.model_id = self._get_model_id(self.inference_mode)
+            logger.info(f"Initialazing voice generator on device: {device}, inference mode: {self.inference_mode}")
+            self.tts = self._load_tts(device)
+            self.sample_rate = self.tts.synthesizer.output_sample_rate
+            self.speaker_latents_cache = SpeakerLatentsCache(
+                max_items=ConfigVoiceGen.SPEAKER_LATENTS_CACHE_SIZE,
+                device=device
+            )
+
+        self.synthesis_cache = self._create_synthesis_cache()
+        self.time_stretcher = self._create_time_stretcher()
+        self._model_ready.set()
+        logger.info(f"Voice generator ready in {time.perf_counter() - load_start_time:.2f}s")
+        if self.write_model_checkpoint:
+            try:
+                self.save_model_checkpoint()
+            except Exception as e:
+                # The model is already in use, a failed checkpoint only slows down the next start
+                logger.warning(f"Could not save model checkpoint: {e}")
+
+    def save_model_checkpoint(self):
+        """
+        Writes the pickled model for the next start if checkpoints are enabled and there is none yet.
+        Called after the model is marked ready, so the first start does not wait for the write.
+        """
+        checkpoint_filepath = self._get_model_checkpoint_filepath()
+        if checkpoint_filepath is None or os.path.exists(checkpoint_filepath):
+            return
+        if self.synthesis_pool is not None:
+            self.synthesis_pool.save_model_checkpoint()
+        else:
+            self._save_model_checkpoint(self.tts, checkpoint_filepath)
+
+    def _load_tts(self, device: str):
+        """
+        Loads the TTS model from the pickled checkpoint if there is one, it skips config parsing
+        and model construction. Otherwise loads it regularly, the checkpoint is written by save_model_checkpoint.
+        """
+        import torch
+        checkpoint_filepath = self._get_model_checkpoint_filepath()
+        if checkpoint_filepath is not None and os.path.exists(checkpoint_filepath):
+            load_start_time = time.perf_counter()
+            try:
+                tts = torch.load(checkpoint_filepath, map_location=device, weights_only=False)
+                logger.info(f"Model loaded from checkpoint {checkpoint_filepath} in {time.perf_counter() - load_start_time:.2f}s")
+                return tts
+            except Exception as e:
+                # A broken checkpoint is rebuilt from the regular model
+                logger.warning(f"Could not load model checkpoint {checkpoint_filepath}, removing it: {e}")
+                try:
+                    os.remove(checkpoint_filepath)
+                except FileNotFoundError:
+                    pass
+
+        import_start_time = time.perf_counter()
+        from TTS.api import TTS
+        logger.info(f"TTS imported in {time.perf_counter() - import_start_time:.2f}s")
+
+        load_start_time = time.perf_counter()
+        tts = TTS(model_name=self.PATH_TO_MODEL, progress_bar=False)
+        logger.info(f"Model loaded in {time.perf_counter() - load_start_time:.2f}s")
+        if self.inference_mode == "int8":
+            self._quantize_model(tts.synthesizer.tts_model)
+        return tts.to(device)
+
+    @classmethod
+    def _quantize_model(cls, model):
+        """
+        Applies dynamic int8 quantization to the GPT part of XTTS, which takes most of the inference time.
+        GPT-2 blocks use transformers Conv1D layers, they are converted to equivalent nn.Linear first.
+        """
+        import torch
+        quantize_start_time = time.perf_counter()
+        cls._convert_conv1d_to_linear(model.gpt)
+        model.gpt = torch.quantization.quantize_dynamic(model.gpt, {torch.nn.Linear}, dtype=torch.qint8)
+        logger.info(f"Model quantized to int8 in {time.perf_counter() - quantize_start_time:.2f}s")
+
+    @classmethod
+    def _convert_conv1d_to_linear(cls, module):
+        import torch
+        for name, child in module.named_children():
+            if type(child).__name__ == "Conv1D":
+                # Conv1D computes x @ weight + bias with weight of shape (in_features, out_features)
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features)
+                linear.weight = torch.nn.Parameter(child.weight.detach().t().contiguous())
+                linear.bias = torch.nn.Parameter(child.bias.detach().clone())
+                setattr(module, name, linear)
+            else:
+                cls._convert_conv1d_to_linear(child)
+
+    @classmethod
+    def _get_model_id(cls, inference_mode: str) -> str:
+        if inference_mode == "fp32":
+            return cls.PATH_TO_MODEL
+        return f"{cls.PATH_TO_MODEL}_{inference_mode}"
+
+    @staticmethod
+    def _save_model_checkpoint(tts, checkpoint_filepath: str):
+        import torch
+        checkpoint_folder = os.path.dirname(checkpoint_filepath)
+        os.makedirs(checkpoint_folder, exist_ok=True)
+        # Another worker container may save the checkpoint at the same time, each one writes its own temp file
+        temp_fd, temp_filepath = tempfile.mkstemp(dir=checkpoint_folder, suffix=".tmp")
+        os.close(temp_fd)
+        try:
+            torch.save(tts, temp_filepath)
+            os.replace(temp_filepath, checkpoint_filepath)
+            logger.info(f"Model checkpoint saved to {checkpoint_filepath}")
+        except Exception as e:
+            logger.warning(f"Could not save model checkpoint {checkpoint_filepath}: {e}")
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+
+    def _get_model_checkpoint_filepath(self) -> str | None:
+        if not ConfigVoiceGen.MODEL_CHECKPOINT_FOLDER:
+            return None
+        # Pickled model classes are only loadable by the same library version
+        tts_version = metadata.version("coqui-tts")
+        model_name = self.model_id.replace("/", "--")
+        return os.path.join(ConfigVoiceGen.MODEL_CHECKPOINT_FOLDER, f"{model_name}_coqui-tts-{tts_version}.pt")
     
-    def generate_audio(self, orig_wav_filepath: str, language: str, json_subs_filepath: str, out_wav_filepath: str):
+    SYNTHESIS_STAGE = "synthesis"
+
+    def generate_audio(self, orig_wav_filepath: str, language: str, json_subs_filepath: str, out_wav_filepath: str,
+                       progress_callback: Callable[[str, int, int], None] | None = None):
+        """progress_callback is called with (stage, done subtitles, total subtitles) as clips get mixed."""
+        self.wait_until_ready()
         self.path_to_temp_folder = self._generate_temp_folder(json_subs_filepath)
 
         subtitles = parse_json_to_subtitles(json_subs_filepath)
@@ -34,84 +225,349 @@ class VoiceGenerator:
             out_folder_name=temp_speakers_folder
         )
 
-        cnt = 1
-        last_subtitle_index = len(subtitles)
+        full_audio_length = subtitles[-1].end_time + 1000 # add 1 second of silence at the end
+        mix_state = MixState(self.path_to_temp_folder)
+        use_incremental_merge = ConfigVoiceGen.INCREMENTAL_MERGE and ConfigVoiceGen.MIX_BUFFER_DTYPE == "float32"
+        already_mixed_ids = set()
+        if use_incremental_merge:
+            audio_mixer, already_mixed_ids = self._open_incremental_mix(mix_state, subtitles, full_audio_length)
+        else:
+            audio_mixer = self._create_audio_mixer(full_audio_length)
+
+        subtitles_max_durations = self._get_subtitles_max_durations(subtitles, full_audio_length)
+        speakers_wav_hashes = {
+            speaker: SpeakerLatentsCache.get_file_hash(speaker_wav_filepath)
+            for speaker, speaker_wav_filepath in speakers_voices.items()
+        }
+
+        checkpoint = TaskCheckpoint(self.path_to_temp_folder, ConfigVoiceGen.CHECKPOINT_INTERVAL)
+        subtitles_to_synthesize = []
+        subtitles_cache_keys = {}
+        cache_hits = 0
+        resumed_clips = 0
         for subtitle in subtitles:
-            logger.debug(f"Progress: {cnt}/{last_subtitle_index}. Synthesysing text: \"{subtitle.text}\"")
-            cnt += 1
-            
-            path_to_subtitle = f"{self.path_to_temp_folder}/{subtitle.id}.wav"
+            if subtitle.id in already_mixed_ids:
+                continue
             path_to_subtitle_adj = f"{self.path_to_temp_folder}/{subtitle.id}_adj.wav"
-            path_to_speaker_ex = speakers_voices[subtitle.speaker]
-
             if not subtitle.modified and os.path.exists(path_to_subtitle_adj):
-                logger.debug(f"Skipping...")
+                adjusted_wav, _ = sf.read(path_to_subtitle_adj, dtype="float32")
+                audio_mixer.add_clip(adjusted_wav, subtitle.start_time)
                 continue
 
-            self._synthesize_text(
-                text_to_speak=subtitle.text, 
-                speaker_ex_wav_filename=path_to_speaker_ex, 
-                out_wav_filepath=path_to_subtitle, 
-                lang=language
-                )
-            self._adjust_audio_speed(
-                input_audio_path=path_to_subtitle,
-                output_audio_path=path_to_subtitle_adj,
-                target_duration=subtitle.duration 
-                )
+            cache_key = SynthesisCache.make_key(
+                text=subtitle.text,
+                language=language,
+                speaker_wav_hash=speakers_wav_hashes[subtitle.speaker],
+                model_id=self.model_id,
+                target_duration=subtitle.duration,
+                max_duration=subtitles_max_durations[subtitle.id]
+            )
+            # Clip finished by an interrupted run of this task
+            adjusted_wav = checkpoint.get_done_clip(subtitle.id, cache_key, path_to_subtitle_adj)
+            if adjusted_wav is not None:
+                audio_mixer.add_clip(adjusted_wav, subtitle.start_time)
+                subtitle.modified = False
+                resumed_clips += 1
+                continue
+
+            adjusted_wav = self.synthesis_cache.get(cache_key, path_to_subtitle_adj)
+            if adjusted_wav is not None:
+                audio_mixer.add_clip(adjusted_wav, subtitle.start_time)
+                subtitle.modified = False
+                cache_hits += 1
+                continue
+
+            subtitles_cache_keys[subtitle.id] = cache_key
+            subtitles_to_synthesize.append(subtitle)
+        logger.debug(f"Subtitles to synthesize: {len(subtitles_to_synthesize)}/{len(subtitles)}, "
+                     f"resumed from checkpoint: {resumed_clips}, synthesis cache hits: {cache_hits}")
+
+        batches = self._split_subtitles_to_speaker_batches(subtitles_to_synthesize, self.batch_size)
+        temp_latents_folder = os.path.join(self.path_to_temp_folder, "speakers_latents")
+        batches_args = [
+            (batch, speakers_voices[batch[0].speaker], temp_latents_folder, language,
+             [subtitles_max_durations[subtitle.id] for subtitle in batch])
+            for batch in batches
+        ]
+        mixed_subtitles_count = 0
+        stretch_results = []
+        done_subtitles_count = len(subtitles) - len(subtitles_to_synthesize)
+        if progress_callback is not None:
+            progress_callback(self.SYNTHESIS_STAGE, done_subtitles_count, len(subtitles))
+
+        def stretch_subtitle(item: Tuple[Subtitle, np.ndarray]) -> Tuple[Subtitle, StretchResult]:
+            subtitle, wav = item
+            return subtitle, self.time_stretcher.fit(wav, subtitle.duration, subtitles_max_durations[subtitle.id])
+
+        def mix_subtitle(item: Tuple[Subtitle, StretchResult]):
+            nonlocal mixed_subtitles_count
+            subtitle, stretch_result = item
+            stretch_results.append(stretch_result)
+            path_to_subtitle_adj = f"{self.path_to_temp_folder}/{subtitle.id}_adj.wav"
+            adjusted_wav = self._write_adjusted_wav(path_to_subtitle_adj, stretch_result.wav)
+            self.synthesis_cache.put(subtitles_cache_keys[subtitle.id], path_to_subtitle_adj)
+            checkpoint.mark_clip_done(subtitle.id, subtitles_cache_keys[subtitle.id], adjusted_wav,
+                                      duration_ms=len(adjusted_wav) * 1000 // self.sample_rate)
+            audio_mixer.add_clip(adjusted_wav, subtitle.start_time)
             subtitle.modified = False
+            mixed_subtitles_count += 1
+            logger.debug(f"Progress: {mixed_subtitles_count}/{len(subtitles_to_synthesize)}")
+            if progress_callback is not None:
+                progress_callback(self.SYNTHESIS_STAGE, done_subtitles_count + mixed_subtitles_count, len(subtitles))
+
+        mix_stage = PipelineStage("mix", mix_subtitle, queue_size=ConfigVoiceGen.PIPELINE_QUEUE_SIZE)
+        if self.synthesis_pool is not None:
+            # Pool processes return already stretched clips
+            source = self._iterate_pool_results(batches, batches_args)
+            stages = [mix_stage]
+        else:
+            source = self._iterate_synthesized_subtitles(batches_args)
+            stretch_stage = PipelineStage(
+                "stretch",
+                stretch_subtitle,
+                num_workers=ConfigVoiceGen.PIPELINE_STRETCH_WORKERS,
+                queue_size=ConfigVoiceGen.PIPELINE_QUEUE_SIZE
+            )
+            stages = [stretch_stage, mix_stage]
+        try:
+            StagedPipeline(stages, metrics_interval=ConfigVoiceGen.PIPELINE_METRICS_INTERVAL).run(source)
+        finally:
+            # Keep clips finished before a failure for the next delivery of the task
+            checkpoint.save()
+        logger.info(f"Time stretch: {TimeStretcher.get_ratio_stats(stretch_results)}")
         
         export_subtitles_to_json_file(subtitles, json_subs_filepath)
+        checkpoint.save(completed=True)
 
-        self._merge_audios(subtitles, out_wav_filepath)
+        audio_mixer.export_wav(out_wav_filepath)
+        if use_incremental_merge:
+            clips_placement = {
+                str(subtitle.id): {
+                    "start_time": subtitle.start_time,
+                    "fingerprint": MixState.get_clip_fingerprint(f"{self.path_to_temp_folder}/{subtitle.id}_adj.wav"),
+                }
+                for subtitle in subtitles
+            }
+            mix_state.save(audio_mixer.track, self.sample_rate, clips_placement)
         
+    def _open_incremental_mix(self, mix_state: MixState, subtitles: List[Subtitle], full_audio_length: int) -> Tuple[AudioMixer, set]:
+        """
+        Opens the mix of the previous run in place and subtracts clips that changed since then, only their
+        sample ranges are read and written. Falls back to a new empty buffer if there is no usable state.
+        Returns the mixer and ids of subtitles whose clips are still in the mix and must not be added again.
+        """
+        length = full_audio_length * self.sample_rate // 1000
+        previous_mix = mix_state.load(self.sample_rate, length)
+        if previous_mix is not None:
+            previous_track, previous_clips = previous_mix
+            kept_ids, clips_to_subtract = self._get_mix_changes(previous_clips, subtitles)
+            if kept_ids is not None:
+                mix_state.invalidate()
+                audio_mixer = AudioMixer.from_track(previous_track, self.sample_rate)
+                for path_to_subtitle_adj, start_time in clips_to_subtract:
+                    old_wav, _ = sf.read(path_to_subtitle_adj, dtype="float32")
+                    audio_mixer.subtract_clip(old_wav, start_time)
+                logger.info(f"Incremental merge: {len(kept_ids)} clips kept from the previous mix, {len(clips_to_subtract)} subtracted")
+                return audio_mixer, kept_ids
+
+        mix_state.invalidate()
+        return AudioMixer.from_track(mix_state.create_buffer(length), self.sample_rate), set()
+
+    def _get_mix_changes(self, previous_clips: dict, subtitles: List[Subtitle]) -> Tuple[set | None, List[tuple]]:
+        """
+        Splits clips of the previous mix into kept subtitle ids and (clip path, start time) of clips to subtract.
+        Kept ids are None if a clip file changed outside of the mix and the track must be rebuilt.
+        """
+        subtitles_by_id = {str(subtitle.id): subtitle for subtitle in subtitles}
+        kept_ids = set()
+        clips_to_subtract = []
+        for subtitle_id, placement in previous_clips.items():
+            path_to_subtitle_adj = f"{self.path_to_temp_folder}/{subtitle_id}_adj.wav"
+            if MixState.get_clip_fingerprint(path_to_subtitle_adj) != placement["fingerprint"]:
+                logger.info(f"Clip {path_to_subtitle_adj} changed since the previous mix, rebuilding the whole track")
+                return None, []
+
+            subtitle = subtitles_by_id.get(subtitle_id)
+            if subtitle is not None and not subtitle.modified and subtitle.start_time == placement["start_time"]:
+                kept_ids.add(subtitle.id)
+            elif placement["fingerprint"] is not None:
+                clips_to_subtract.append((path_to_subtitle_adj, placement["start_time"]))
+        return kept_ids, clips_to_subtract
+
     def _generate_temp_folder(self, subs_filepath: str) -> str:
         temp_folder_name = "temp_" + os.path.split(subs_filepath)[1].split(".")[-2]
         path_to_temp_folder = os.path.join(self.BASE_TEMP_FOLDER_NAME, temp_folder_name)
         os.makedirs(path_to_temp_folder, exist_ok=True)
         return path_to_temp_folder
            
-    def _synthesize_text(self, text_to_speak: str, speaker_ex_wav_filename: str, out_wav_filepath: str, lang: str):
-        if len(text_to_speak) == 0:
-            raise KeyError("Error. Text to speak is empty")
-        self.tts.tts_to_file(text=text_to_speak, 
-                             speaker_wav=speaker_ex_wav_filename, 
-                             language=lang, 
-                             file_path=out_wav_filepath)
-        time.sleep(0.1)
-
-    def _adjust_audio_speed(self, input_audio_path: str, output_audio_path: str, target_duration: int):
-        audio = AudioSegment.from_file(input_audio_path)
-        current_duration = len(audio)
-        speed_ratio = target_duration / current_duration
-        
-        # Set warnings in bad cases
-        if speed_ratio < 0.2:
-            logger.warning(f"Speed ratio is too low: {speed_ratio}. Result may be bad.")
-        elif speed_ratio > 2.5:
-            logger.warning(f"Speed ratio is too high: {speed_ratio}. Result may be bad.")
-        
-        stretch_audio(input_audio_path, output_audio_path, ratio=speed_ratio)
+    def synthesize_batch(self, batch: List[Subtitle], speaker_wav_filepath: str, latents_folder: str, language: str,
+                         max_durations: List[int]):
+        """
+        Synthesizes and time-stretches subtitles of one speaker.
+        Returns stretch results in batch order, batch wall time in seconds and duration of synthesized audio in ms.
+        """
+        batch_start_time = time.perf_counter()
+        synthesized_wavs = []
+        synthesized_audio_ms = 0
+        for _, wav in self._synthesize_subtitles(batch, speaker_wav_filepath, latents_folder, language):
+            synthesized_audio_ms += len(wav) * 1000 // self.sample_rate
+            synthesized_wavs.append(wav)
+        stretch_results = self.time_stretcher.fit_batch(
+            synthesized_wavs,
+            target_durations=[subtitle.duration for subtitle in batch],
+            max_durations=max_durations
+        )
+
+        return stretch_results, time.perf_counter() - batch_start_time, synthesized_audio_ms
+
+    def _synthesize_subtitles(self, batch: List[Subtitle], speaker_wav_filepath: str, latents_folder: str,
+                              language: str) -> Iterator[Tuple[Subtitle, np.ndarray]]:
+        gpt_cond_latent, speaker_embedding = self.speaker_latents_cache.get(
+            speaker_wav_filepath=speaker_wav_filepath,
+            model_id=self.model_id,
+            cache_folder=latents_folder,
+            compute_latents=self._get_speaker_conditioning
+        )
+        for subtitle in batch:
+            logger.debug(f"Synthesysing text: \"{subtitle.text}\"")
+            wav = self._synthesize_text(
+                text_to_speak=subtitle.text,
+                gpt_cond_latent=gpt_cond_latent,
+                speaker_embedding=speaker_embedding,
+                lang=language
+                )
+            yield subtitle, wav
 
-    def _merge_audios(self, subtitles: List[Subtitle], output_filepath: str):
-        last_sub_end_time = subtitles[-1].end_time
-        full_audio_length = last_sub_end_time + 1000 # add 1 second of silence at the end
+    def _iterate_synthesized_subtitles(self, batches_args: List[tuple]) -> Iterator[Tuple[Subtitle, np.ndarray]]:
+        for batch_index, batch_args in enumerate(batches_args, start=1):
+            batch_start_time = time.perf_counter()
+            synthesized_audio_ms = 0
+            batch, speaker_wav_filepath, latents_folder, language, _ = batch_args
+            for subtitle, wav in self._synthesize_subtitles(batch, speaker_wav_filepath, latents_folder, language):
+                synthesized_audio_ms += len(wav) * 1000 // self.sample_rate
+                yield subtitle, wav
+            self._log_batch_timing(batch_index, len(batches_args), batch,
+                                   time.perf_counter() - batch_start_time, synthesized_audio_ms)
 
-        final_audio = AudioSegment.silent(duration=full_audio_length)
+    def _iterate_pool_results(self, batches: List[List[Subtitle]], batches_args: List[tuple]) -> Iterator[Tuple[Subtitle, StretchResult]]:
+        batches_results = self.synthesis_pool.imap_batches(batches_args)
+        for batch_index, (batch, batch_result) in enumerate(zip(batches, batches_results), start=1):
+            stretch_results, batch_time, synthesized_audio_ms = batch_result
+            self._log_batch_timing(batch_index, len(batches), batch, batch_time, synthesized_audio_ms)
+            yield from zip(batch, stretch_results)
 
+    def _write_adjusted_wav(self, path_to_subtitle_adj: str, adjusted_wav: np.ndarray) -> np.ndarray:
+        """
+        Writes the clip as 16-bit PCM and returns the written int16 samples. The returned samples are the ones
+        to mix, they read back bit-exact, so the incremental merge can subtract exactly what was mixed.
+        """
+        if adjusted_wav.dtype != np.int16:
+            adjusted_wav = np.round(np.clip(adjusted_wav, -1.0, 1.0) * AudioMixer.INT16_MAX).astype(np.int16)
+        # The old file may be hard-linked into the synthesis cache, it is replaced instead of overwritten
+        if os.path.exists(path_to_subtitle_adj):
+            os.remove(path_to_subtitle_adj)
+        sf.write(path_to_subtitle_adj, adjusted_wav, self.sample_rate, subtype="PCM_16")
+        return adjusted_wav
+
+    @staticmethod
+    def _get_subtitles_max_durations(subtitles: List[Subtitle], full_audio_length: int) -> dict:
+        """Max clip duration of every subtitle: up to the start of the next subtitle or the end of the track."""
+        max_durations = {}
+        for i, subtitle in enumerate(subtitles):
+            next_start_time = subtitles[i + 1].start_time if i + 1 < len(subtitles) else full_audio_length
+            max_durations[subtitle.id] = max(next_start_time - subtitle.start_time, subtitle.duration)
+        return max_durations
+
+    @staticmethod
+    def _log_batch_timing(batch_index: int, batches_count: int, batch: List[Subtitle], batch_time: float, synthesized_audio_ms: int):
+        real_time_factor = batch_time * 1000 / max(synthesized_audio_ms, 1)
+        logger.info(f"Batch {batch_index}/{batches_count} (speaker {batch[0].speaker}, {len(batch)} subtitles) "
+                    f"synthesized in {batch_time:.2f}s, RTF {real_time_factor:.2f}")
+
+    @staticmethod
+    def _split_subtitles_to_speaker_batches(subtitles: List[Subtitle], batch_size: int) -> List[List[Subtitle]]:
+        """Groups subtitles by speaker and splits every group into batches of at most batch_size subtitles."""
+        speaker_subtitles = {}
         for subtitle in subtitles:
-            audio_file = f"{self.path_to_temp_folder}/{subtitle.id}_adj.wav"
-            if not os.path.exists(audio_file):
-                logger.warning(f"Audio file {audio_file} is not exist.")
-                continue
+            speaker_subtitles.setdefault(subtitle.speaker, []).append(subtitle)
 
-            audio_segment = AudioSegment.from_wav(audio_file)
+        batches = []
+        for speaker_group in speaker_subtitles.values():
+            for i in range(0, len(speaker_group), batch_size):
+                batches.append(speaker_group[i:i + batch_size])
+        return batches
 
-            final_audio = final_audio.overlay(audio_segment, position=subtitle.start_time)
+    def _get_speaker_conditioning(self, speaker_ex_wav_filename: str):
+        import torch
+        model = self.tts.synthesizer.tts_model
+        with torch.inference_mode():
+            return model.get_conditioning_latents(
+                audio_path=[speaker_ex_wav_filename],
+                gpt_cond_len=model.config.gpt_cond_len,
+                gpt_cond_chunk_len=model.config.gpt_cond_chunk_len,
+                max_ref_length=model.config.max_ref_len,
+                sound_norm_refs=model.config.sound_norm_refs,
+            )
 
-        final_audio.export(output_filepath, format="wav")
+    def _synthesize_text(self, text_to_speak: str, gpt_cond_latent, speaker_embedding, lang: str) -> np.ndarray:
+        if len(text_to_speak) == 0:
+            raise KeyError("Error. Text to speak is empty")
+        text_chunks = split_text(text_to_speak, ConfigVoiceGen.SYNTHESIS_MAX_CHUNK_LENGTH)
+        if len(text_chunks) == 1:
+            return self._synthesize_text_chunk(text_chunks[0], gpt_cond_latent, speaker_embedding, lang)
+
+        logger.debug(f"Synthesizing text of {len(text_to_speak)} symbols in {len(text_chunks)} chunks")
+        wavs = [
+            self._synthesize_text_chunk(text_chunk, gpt_cond_latent, speaker_embedding, lang)
+            for text_chunk in text_chunks
+        ]
+        crossfade_length = ConfigVoiceGen.SYNTHESIS_CHUNK_CROSSFADE_MS * self.sample_rate // 1000
+        return AudioMixer.crossfade_join(wavs, crossfade_length)
+
+    def _synthesize_text_chunk(self, text_to_speak: str, gpt_cond_latent, speaker_embedding, lang: str) -> np.ndarray:
+        import torch
+        model = self.tts.synthesizer.tts_model
+        with torch.inference_mode():
+            output = model.inference(
+                text=text_to_speak,
+                language=lang,
+                gpt_cond_latent=gpt_cond_latent,
+                speaker_embedding=speaker_embedding,
+                temperature=model.config.temperature,
+                length_penalty=model.config.length_penalty,
+                repetition_penalty=model.config.repetition_penalty,
+                top_k=model.config.top_k,
+                top_p=model.config.top_p,
+                # Still needed for languages with a lower XTTS character limit than the chunk length
+                enable_text_splitting=True,
+            )
+        return np.asarray(output["wav"], dtype=np.float32)
+
+    def _create_synthesis_cache(self) -> SynthesisCache:
+        return SynthesisCache(
+            cache_folder=ConfigVoiceGen.SYNTHESIS_CACHE_FOLDER,
+            max_size_bytes=ConfigVoiceGen.SYNTHESIS_CACHE_MAX_SIZE_MB * 1024 * 1024,
+            sample_rate=self.sample_rate
+        )
+
+    def _create_time_stretcher(self) -> TimeStretcher:
+        return TimeStretcher(
+            sample_rate=self.sample_rate,
+            min_ratio=ConfigVoiceGen.STRETCH_MIN_RATIO,
+            max_ratio=ConfigVoiceGen.STRETCH_MAX_RATIO
+        )
+
+    def _create_audio_mixer(self, duration_ms: int) -> AudioMixer:
+        memmap_filepath = None
+        if ConfigVoiceGen.MIX_BUFFER_USE_MEMMAP:
+            memmap_filepath = os.path.join(self.path_to_temp_folder, "mix_buffer.raw")
+        return AudioMixer(
+            duration_ms=duration_ms,
+            sample_rate=self.sample_rate,
+            dtype=ConfigVoiceGen.MIX_BUFFER_DTYPE,
+            memmap_filepath=memmap_filepath
+        )
 
-    
     @staticmethod
     def replace_audio_in_video(in_audio_path: str, in_video_path: str, out_video_path: str):
         audio_worker.inject_audio_in_video(in_audio_path, in_video_path, out_video_path, "200k")
\ No newline at end of file